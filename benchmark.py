@@ -0,0 +1,142 @@
+"""
+Offline end-to-end benchmark of the refresh cycle.
+
+Serves the recorded NSE responses and the fake chart page from stub_server.py,
+then runs NSEFetcher + DhanGrid.update_charts for several cycles with a
+rotating ranking. Reports full-cycle latency, per-frame update time and
+WebDriver call counts, so regressions in the update loop show up before they
+hit a trading session.
+
+Usage:
+    python benchmark.py                      # fake WebDriver, no browser needed
+    python benchmark.py --driver chrome      # headless Chrome against the fake chart page
+    python benchmark.py --cycles 20 --churn 6 --api-failure-rate 0.1
+"""
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from collections import Counter
+
+import metrics
+from stub_server import start_stub_server, StubHandler, RECORDINGS_DIR
+from fake_webdriver import FakeDriver
+from main import NSEFetcher, DhanGrid, NSE_API_PATH, GRID_SLOTS
+
+
+def make_rankings(cycles, churn, seed=1):
+    """
+    Yields one ranking (list of API rows) per cycle. Each cycle `churn` symbols are replaced,
+    a few ranks are shuffled and one symbol from below the grid cut-off climbs into it.
+    """
+    with open(os.path.join(RECORDINGS_DIR, "volume_gainers.json")) as f:
+        rows = json.load(f)["data"]
+    rng = random.Random(seed)
+    spare = 0
+    current = list(rows)
+    for cycle in range(cycles):
+        if cycle > 0:
+            for _ in range(churn):
+                idx = rng.randrange(1, len(current))
+                spare += 1
+                current[idx] = dict(current[idx], symbol=f"BENCH{spare}")
+            for _ in range(3):
+                a = rng.randrange(1, len(current) - 1)
+                current[a], current[a + 1] = current[a + 1], current[a]
+            if len(current) > 25:
+                current.insert(rng.randrange(1, 25), current.pop(rng.randrange(25, len(current))))
+        yield [dict(row) for row in current]
+
+
+def count_calls(driver):
+    """Counts every WebDriver command a real driver sends (each one is a round-trip)."""
+    driver.calls = Counter()
+    send = driver.execute
+
+    def execute(command, params=None):
+        driver.calls[command] += 1
+        return send(command, params)
+
+    driver.execute = execute
+    return driver
+
+
+def run(args):
+    server, base_url = start_stub_server()
+    chart_url = f"{base_url}/chart"
+    metrics.recorder.path = args.metrics
+
+    fetcher = NSEFetcher(mode="http", base_url=base_url)
+    # Stub symbols must never end up in the real crash-recovery state (state.json)
+    state_file = os.path.join(tempfile.mkdtemp(prefix="grid-bench-"), "state.json")
+    if args.driver == "chrome":
+        grid = DhanGrid(chart_url=chart_url, profile_dir=None, headless=True, state_file=state_file)
+        grid.start()
+        count_calls(grid.driver)
+    else:
+        grid = DhanGrid(chart_url=chart_url, profile_dir=None, state_file=state_file)
+        grid.driver = FakeDriver(
+            call_latency=args.call_latency,
+            frame_latency=args.frame_latency,
+            api_failure_rate=args.api_failure_rate,
+        )
+        grid.grid_handles = [grid.driver.current_window_handle]
+        grid.install_frame_scripts()
+
+    cycle_ms = []
+    call_counts = []
+    try:
+        fetcher.start()
+        for cycle, ranking in enumerate(make_rankings(args.cycles, args.churn)):
+            StubHandler.overrides[NSE_API_PATH] = json.dumps({"data": ranking}).encode()
+            grid.driver.calls.clear()
+
+            started = time.perf_counter()
+            with metrics.span("cycle"):
+                fetched = fetcher.get_top_symbols(limit=30)
+                symbols = fetched[:GRID_SLOTS]
+                with metrics.span("update_charts"):
+                    updated, skipped = grid.update_charts(symbols, standby=fetched[GRID_SLOTS:])
+            elapsed = (time.perf_counter() - started) * 1000
+
+            calls = sum(grid.driver.calls.values())
+            cycle_ms.append(elapsed)
+            call_counts.append(calls)
+            metrics.end_cycle(symbols=len(symbols), updated=updated, skipped=skipped, webdriver_calls=calls)
+            print(f"cycle {cycle + 1:>3}: {elapsed:9.1f} ms  updated={updated:<3} skipped={skipped:<3} webdriver_calls={calls}")
+    finally:
+        fetcher.stop()
+        grid.close()
+        server.shutdown()
+
+    print("")
+    metrics.report(args.metrics)
+    print("")
+    print(f"WebDriver calls/cycle: first={call_counts[0]} steady-state avg={sum(call_counts[1:]) / max(1, len(call_counts) - 1):.1f}")
+    print(f"Cycle latency: first={cycle_ms[0]:.1f} ms steady-state avg={sum(cycle_ms[1:]) / max(1, len(cycle_ms) - 1):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the fetch + grid update cycle.")
+    parser.add_argument("--driver", choices=["fake", "chrome"], default="fake")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--churn", type=int, default=4, help="symbols replaced in the ranking per cycle")
+    parser.add_argument("--frame-latency", type=float, default=0.15, help="fake driver: seconds per chart symbol load")
+    parser.add_argument("--call-latency", type=float, default=0.002, help="fake driver: seconds per WebDriver call")
+    parser.add_argument("--api-failure-rate", type=float, default=0.0, help="fake driver: share of chart API calls that fail")
+    parser.add_argument("--metrics", default=None, help="keep the per-cycle JSONL here (default: temp file)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.metrics:
+        fd, args.metrics = tempfile.mkstemp(prefix="bench_", suffix=".jsonl")
+        os.close(fd)
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
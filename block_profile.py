@@ -0,0 +1,223 @@
+"""
+Request-blocking profile for the grid browser.
+
+Every chart iframe loads the full TradingView/Dhan app: analytics beacons, web
+fonts, chat and news widgets... none of which a chart needs. The blocking
+profile turns the categories below into declarativeNetRequest rules and builds
+them, together with the header stripper in ignore_headers_extension/, into
+the extension that DhanGrid loads with --load-extension.
+
+Profiles: "off", "lean" (analytics, widgets, Google Fonts), "aggressive" (+ every
+other web font, logos, media). Chart icon fonts may be served by the chart host
+itself, so only aggressive blocks fonts from any origin. Extra url filters can be
+added with BLOCK_EXTRA, comma separated in declarativeNetRequest urlFilter
+syntax (e.g. "||example.com/orderpanel^").
+
+Measure a profile against no blocking (bytes, requests, time-to-first-candle per frame):
+    python block_profile.py --measure --frames 6
+    python block_profile.py --measure --chart-url http://127.0.0.1:8765/chart
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+
+EXTENSION_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ignore_headers_extension")
+EXTENSION_BUILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grid_extension")
+BLOCK_EXTRA = [f.strip() for f in os.environ.get("BLOCK_EXTRA", "").split(",") if f.strip()]
+
+# Requests started by these sites are never blocked (the shared NSE tab must look like a normal browser)
+NEVER_BLOCK_INITIATORS = ["nseindia.com"]
+
+NON_DOCUMENT = ["script", "xmlhttprequest", "image", "ping", "stylesheet", "font", "media", "websocket", "other"]
+
+# category -> [(urlFilter or None for "any url", resource types)]
+BLOCK_CATEGORIES = {
+    "analytics": [
+        ("||google-analytics.com^", NON_DOCUMENT),
+        ("||googletagmanager.com^", NON_DOCUMENT),
+        ("||doubleclick.net^", NON_DOCUMENT),
+        ("||connect.facebook.net^", NON_DOCUMENT),
+        ("||clarity.ms^", NON_DOCUMENT),
+        ("||hotjar.com^", NON_DOCUMENT),
+        ("||mixpanel.com^", NON_DOCUMENT),
+        ("||amplitude.com^", NON_DOCUMENT),
+        ("||segment.io^", NON_DOCUMENT),
+        ("||moengage.com^", NON_DOCUMENT),
+        ("||webengage.com^", NON_DOCUMENT),
+        ("||clevertap-prod.com^", NON_DOCUMENT),
+        ("||sentry.io^", NON_DOCUMENT),
+    ],
+    "widgets": [
+        ("||intercom.io^", NON_DOCUMENT + ["sub_frame"]),
+        ("||intercomcdn.com^", NON_DOCUMENT + ["sub_frame"]),
+        ("||freshchat.com^", NON_DOCUMENT + ["sub_frame"]),
+        ("||zdassets.com^", NON_DOCUMENT + ["sub_frame"]),
+        ("||tawk.to^", NON_DOCUMENT + ["sub_frame"]),
+        ("||news-headlines.tradingview.com^", NON_DOCUMENT),
+        ("||youtube.com/embed^", ["sub_frame"]),
+    ],
+    "fonts": [
+        ("||fonts.googleapis.com^", ["stylesheet", "font"]),
+        ("||fonts.gstatic.com^", ["font"]),
+    ],
+    "all_fonts": [
+        (None, ["font"]),  # charts fall back to system fonts, toolbar icon fonts included
+    ],
+    "logos": [
+        ("||s3-symbol-logo.tradingview.com^", ["image"]),
+    ],
+    "media": [
+        (None, ["media"]),
+    ],
+}
+
+BLOCK_PROFILES = {
+    "off": [],
+    "lean": ["analytics", "widgets", "fonts"],
+    "aggressive": ["analytics", "widgets", "fonts", "all_fonts", "logos", "media"],
+}
+
+
+def build_rules(profile, extra=BLOCK_EXTRA):
+    """declarativeNetRequest block rules for `profile` (+ extra url filters)."""
+    if profile not in BLOCK_PROFILES:
+        raise ValueError(f"Unknown block profile '{profile}' (known: {', '.join(BLOCK_PROFILES)})")
+    entries = [entry for category in BLOCK_PROFILES[profile] for entry in BLOCK_CATEGORIES[category]]
+    entries += [(url_filter, NON_DOCUMENT + ["sub_frame"]) for url_filter in extra]
+    rules = []
+    for rule_id, (url_filter, types) in enumerate(entries, start=1):
+        condition = {"resourceTypes": types, "excludedInitiatorDomains": NEVER_BLOCK_INITIATORS}
+        if url_filter:
+            condition["urlFilter"] = url_filter
+        rules.append({"id": rule_id, "priority": 1, "action": {"type": "block"}, "condition": condition})
+    return rules
+
+
+def build_extension(profile, out_dir=EXTENSION_BUILD):
+    """
+    Writes the grid extension (header stripper + `profile` block rules) to `out_dir`.
+    Returns its path. Rewritten on every start, so config changes apply on the next launch.
+    """
+    shutil.rmtree(out_dir, ignore_errors=True)
+    shutil.copytree(EXTENSION_SRC, out_dir)
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    rules = build_rules(profile)
+    with open(os.path.join(out_dir, "block_rules.json"), "w") as f:
+        json.dump(rules, f, indent=2)
+    manifest["declarative_net_request"]["rule_resources"].append(
+        {"id": "block_rules", "enabled": bool(rules), "path": "block_rules.json"}
+    )
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+    logging.info(f"Grid extension built with block profile '{profile}' ({len(rules)} rules).")
+    return out_dir
+
+
+def extension_flags(path):
+    # Branded Chrome 137+ ignores --load-extension unless the switch is re-enabled
+    return [f"--load-extension={path}", "--disable-features=DisableLoadExtensionCommandLineSwitch"]
+
+
+# --- Measurement ------------------------------------------------------------
+
+# arguments: chart url, frame count. Replaces the page with `count` chart frames.
+MEASURE_PAGE_JS = """
+document.documentElement.innerHTML = '<body style="margin:0"></body>';
+for (var i = 0; i < arguments[1]; i++) {
+    var f = document.createElement('iframe');
+    f.id = 'measure-' + i;
+    f.style.cssText = 'width:33vw;height:50vh;border:0';
+    f.src = arguments[0] + '/?symbol=NSE:NIFTY&m=' + i;
+    document.body.appendChild(f);
+}
+"""
+
+# ms from each frame's navigation start to the chart reporting its first loaded symbol (null = not yet)
+FIRST_CANDLE_JS = """
+return Array.prototype.map.call(document.querySelectorAll('iframe[id^="measure-"]'), function(f) {
+    try {
+        var w = f.contentWindow;
+        return w.__symbolLoadedAt ? w.__symbolLoadedAt - w.performance.timeOrigin : null;
+    } catch (e) { return null; }
+});
+"""
+
+
+def measure(profile, chart_url, frames, profile_dir=None, timeout=60):
+    """Loads `frames` chart frames with `profile`. Returns {requests, blocked, bytes, ttfc: [ms or None]}."""
+    from main import DhanGrid
+    from cdp_events import EventPump
+
+    grid = DhanGrid(chart_url=chart_url, profile_dir=profile_dir, headless=True, mode="launch", block_profile=profile)
+    stats = {"requests": 0, "blocked": 0, "bytes": 0}
+
+    def on_event(method, params):
+        if method == "Network.requestWillBeSent":
+            stats["requests"] += 1
+        elif method == "Network.loadingFinished":
+            stats["bytes"] += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and (params.get("blockedReason") or "BLOCKED_BY_CLIENT" in params.get("errorText", "")):
+            stats["blocked"] += 1
+
+    try:
+        grid.start()
+        pump = EventPump(grid.driver)
+        pump.poll()  # drop the start page's events
+        pump.subscribe(on_event)
+        grid.driver.execute_script(MEASURE_PAGE_JS, grid.chart_url, frames)
+        deadline = time.monotonic() + timeout
+        ttfc = [None] * frames
+        while time.monotonic() < deadline:
+            ttfc = grid.driver.execute_script(FIRST_CANDLE_JS)
+            if all(t is not None for t in ttfc):
+                break
+            time.sleep(0.2)
+        time.sleep(1)  # let trailing requests finish
+        pump.poll()
+    finally:
+        grid.close()
+    stats["ttfc"] = ttfc
+    return stats
+
+
+def report(results, out_frames):
+    def median(values):
+        values = sorted(v for v in values if v is not None)
+        return values[len(values) // 2] if values else float("nan")
+
+    print(f"{'PROFILE':<12}{'REQUESTS':>10}{'BLOCKED':>10}{'KB':>12}{'TTFC p50 ms':>14}{'TTFC max ms':>14}{'LOADED':>9}")
+    for profile, stats in results.items():
+        ttfc = stats["ttfc"]
+        loaded = sum(t is not None for t in ttfc)
+        worst = max((t for t in ttfc if t is not None), default=float("nan"))
+        print(f"{profile:<12}{stats['requests']:>10}{stats['blocked']:>10}{stats['bytes'] / 1024:>12.0f}"
+              f"{median(ttfc):>14.0f}{worst:>14.0f}{loaded:>6}/{out_frames}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the grid extension or measure a blocking profile.")
+    parser.add_argument("--profile", default=os.environ.get("BLOCK_PROFILE", "lean"), choices=list(BLOCK_PROFILES))
+    parser.add_argument("--measure", action="store_true", help="compare the profile against 'off' in headless Chrome")
+    parser.add_argument("--chart-url", default=os.environ.get("DHAN_CHART_URL", "https://tv.dhan.co"))
+    parser.add_argument("--frames", type=int, default=6)
+    parser.add_argument("--profile-dir", default=None, help="Chrome profile (e.g. user_data for a logged-in session)")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if not args.measure:
+        path = build_extension(args.profile)
+        print(f"Built {path} ({len(build_rules(args.profile))} block rules, profile '{args.profile}').")
+        return
+    results = {}
+    for profile in ("off", args.profile):
+        results[profile] = measure(profile, args.chart_url, args.frames, args.profile_dir)
+    report(results, args.frames)
+
+
+if __name__ == "__main__":
+    main()
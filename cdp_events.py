@@ -0,0 +1,99 @@
+"""
+DevTools event stream for a Selenium Chrome session.
+
+Selenium's execute_cdp_cmd cannot subscribe to events, but ChromeDriver
+records them in the 'performance' log (see enable_event_log). EventPump drains
+that log, keeps the most recent events in a bounded ring buffer and hands each
+one to the registered listeners.
+"""
+import json
+import time
+import threading
+from collections import deque
+
+RING_SIZE = 2000
+# Open for the page's lifetime by design (TradingView data feed, push channels): never "finish"
+LONG_LIVED_TYPES = {"WebSocket", "EventSource"}
+
+
+def enable_event_log(options):
+    """Turns on the ChromeDriver performance log (Network + Page CDP events) for `options`."""
+    prefs = dict(options.capabilities.get("goog:loggingPrefs") or {})
+    prefs["performance"] = "ALL"
+    options.set_capability("goog:loggingPrefs", prefs)
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": True})
+
+
+class EventPump:
+    def __init__(self, driver, size=RING_SIZE):
+        self.driver = driver
+        self.events = deque(maxlen=size)  # (monotonic time, method, params)
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, listener):
+        """listener(method, params) is called for every drained event."""
+        self.listeners.append(listener)
+
+    def poll(self):
+        """Drains pending events. Returns how many were read."""
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return 0
+        with self.lock:
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError, TypeError):
+                    continue
+                method, params = message.get("method"), message.get("params", {})
+                self.events.append((time.monotonic(), method, params))
+                for listener in self.listeners:
+                    listener(method, params)
+        return len(entries)
+
+
+class NetworkTracker:
+    """
+    In-flight requests from Network.* events, for network-idle waits. The event log
+    covers the whole browser (every tab and frame), so waits can be scoped to one
+    DevTools frame id; websockets and event streams are never counted.
+    """
+
+    def __init__(self, pump):
+        self.pump = pump
+        self.inflight = {}  # request id -> frame id
+        self.last_activity = 0.0
+        self.frame_activity = {}  # frame id -> monotonic time of its last request start/finish
+        pump.subscribe(self.on_event)
+
+    def on_event(self, method, params):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if params.get("type") in LONG_LIVED_TYPES:
+                return
+            frame = params.get("frameId")
+            self.inflight[request_id] = frame
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            if request_id not in self.inflight:
+                return  # long-lived, or started before we were listening
+            frame = self.inflight.pop(request_id)
+        else:
+            return
+        now = time.monotonic()
+        self.last_activity = now
+        self.frame_activity[frame] = now
+
+    def is_idle(self, quiet=0.25, frame_id=None):
+        """
+        No request in flight and none started/finished for `quiet` seconds, in the whole
+        browser or, with `frame_id`, in that frame only.
+        """
+        self.pump.poll()
+        if frame_id is None:
+            busy, last = bool(self.inflight), self.last_activity
+        else:
+            busy = frame_id in self.inflight.values()
+            last = self.frame_activity.get(frame_id, 0.0)
+        return not busy and time.monotonic() - last >= quiet
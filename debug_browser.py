@@ -0,0 +1,55 @@
+"""
+Long-lived Chrome for attach mode.
+
+Chrome is started detached with --remote-debugging-port and the user_data
+profile, so it outlives main.py: a crash or code reload re-attaches to the
+same logged-in browser (and the grid already on screen) in seconds instead of
+booting Chrome and logging in again.
+"""
+import os
+import time
+import shutil
+import socket
+import logging
+import subprocess
+
+CHROME_CANDIDATES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+
+def port_open(port, host="127.0.0.1"):
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def find_chrome():
+    binary = os.environ.get("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome not found on PATH. Set CHROME_BINARY to its location.")
+
+
+def ensure_debug_browser(port, profile_dir, flags=(), start_url="about:blank", timeout=20):
+    """Starts Chrome with a debugging port unless one is already listening. Returns True if it was launched."""
+    if port_open(port):
+        logging.info(f"Attaching to running Chrome on port {port}.")
+        return False
+
+    cmd = [find_chrome(), f"--remote-debugging-port={port}", f"--user-data-dir={profile_dir}"]
+    cmd += list(flags)
+    cmd.append(start_url)
+    logging.info(f"Launching detached Chrome on port {port}...")
+    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if port_open(port):
+            return True
+        time.sleep(0.2)
+    raise TimeoutError(f"Chrome did not open debugging port {port} within {timeout}s")
@@ -0,0 +1,100 @@
+"""
+Driver/browser watchdog.
+
+Checks every WATCH_INTERVAL seconds, WITHOUT going through WebDriver (whose
+commands queue behind a running grid update), that:
+    - the chromedriver process is still running,
+    - Chrome still answers on its DevTools port,
+    - every grid window still exists (ChromeDriver window handles are DevTools target ids).
+A failed check sets `dead`, so a crash is noticed within about a second even
+in the middle of an update (a DevTools endpoint that merely times out gets
+SLOW_PROBES chances first).
+"""
+import logging
+import threading
+
+import requests
+
+WATCH_INTERVAL = 0.5  # seconds
+PROBE_TIMEOUT = 1.0  # seconds for the DevTools HTTP endpoint
+SLOW_PROBES = 3  # consecutive timeouts before a busy-but-alive Chrome counts as hung
+
+
+class DriverWatchdog:
+    def __init__(self, grid, interval=WATCH_INTERVAL):
+        self.grid = grid
+        self.interval = interval
+        self.dead = threading.Event()
+        self.reason = None
+        self.timeouts = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """(Re)arms the watchdog for the grid's current driver."""
+        self.dead.clear()
+        self.reason = None
+        self.timeouts = 0
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="driver-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def alive(self):
+        return not self.dead.is_set()
+
+    def kill(self, reason):
+        """Declares the browser dead for a reason found elsewhere (e.g. a crashed renderer)."""
+        if self.dead.is_set():
+            return
+        self.reason = reason
+        self.dead.set()
+        logging.error(f"Watchdog: {reason}")
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            if self.dead.is_set():
+                continue
+            reason = self.check()
+            if reason:
+                self.reason = reason
+                self.dead.set()
+                logging.error(f"Watchdog: {reason}")
+
+    def _debugger_address(self, driver):
+        return (driver.capabilities.get("goog:chromeOptions") or {}).get("debuggerAddress")
+
+    def check(self):
+        """Returns why the browser is considered dead, or None."""
+        driver = self.grid.driver
+        if driver is None:
+            return None
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None and process.poll() is not None:
+            return f"chromedriver exited (code {process.returncode})."
+
+        address = self._debugger_address(driver)
+        if not address:
+            return None
+        try:
+            targets = requests.get(f"http://{address}/json/list", timeout=PROBE_TIMEOUT).json()
+        except requests.Timeout:
+            self.timeouts += 1
+            return f"Chrome hung (DevTools on {address} not answering)." if self.timeouts >= SLOW_PROBES else None
+        except requests.RequestException:
+            return f"Chrome stopped answering on {address}."
+        except ValueError:
+            return None
+        self.timeouts = 0
+        pages = {t.get("id") for t in targets if t.get("type") == "page"}
+        if not pages:
+            return "all Chrome windows were closed."
+        if any(handle not in pages for handle in self.grid.grid_handles):
+            return "a grid window was closed."
+        return None
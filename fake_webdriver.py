@@ -0,0 +1,151 @@
+"""
+In-process stand-in for a Selenium Chrome driver, used by benchmark.py.
+
+It implements just the WebDriver surface DhanGrid touches, counts every call
+(one call == one WebDriver round-trip on a real driver) and simulates the
+round-trip and chart load latencies so the update loop can be profiled
+without a browser.
+"""
+import time
+import random
+from collections import Counter
+
+from selenium.common.exceptions import WebDriverException
+
+
+class FakeElement:
+    def __init__(self, driver, locator):
+        self.driver = driver
+        self.locator = locator
+
+    def click(self):
+        self.driver._call("click")
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def frame(self, frame):
+        self.driver._call("switch_to.frame")
+
+    def default_content(self):
+        self.driver._call("switch_to.default_content")
+
+    def window(self, handle):
+        self.driver._call("switch_to.window")
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.driver._call("switch_to.new_window")
+        self.driver.window_handles.append(f"fake-window-{len(self.driver.window_handles)}")
+        self.driver.current_window_handle = self.driver.window_handles[-1]
+
+
+# Readiness probes (readiness.py) that the fake always reports as satisfied
+READY_PROBES = ("__canvasReady", "hasFocus", "activeElement", "active-page", "getElementById('tab-0')")
+
+
+class FakeDriver:
+    def __init__(self, call_latency=0.002, frame_latency=0.15, api_failure_rate=0.0, seed=1):
+        self.call_latency = call_latency  # seconds per WebDriver round-trip
+        self.frame_latency = frame_latency  # seconds for a chart to load a new symbol
+        self.api_failure_rate = api_failure_rate  # share of frames whose chart API "fails"
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.frames = {}  # frame id -> symbol displayed
+        self.probes = {}  # frame id -> state the health probe reports
+        self.switch_to = FakeSwitchTo(self)
+        self.window_handles = ["fake-window-0"]
+        self.current_window_handle = "fake-window-0"
+        self.grids = {}  # window handle -> what ADOPT_GRID_JS finds there (attach mode)
+        self.cdp_calls = []  # (window handle, command): CDP commands apply to the current target
+        self.title = "Fake Chart"
+        self.heap_bytes = 0
+        self.crashed = False  # crash mode: page scripts fail like a dead renderer ("Aw, Snap")
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.call_latency:
+            time.sleep(self.call_latency)
+
+    def get(self, url):
+        self._call("get")
+
+    def refresh(self):
+        self._call("refresh")
+
+    def set_window_rect(self, x=None, y=None, width=None, height=None):
+        self._call("set_window_rect")
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._call("execute_cdp_cmd")
+        self.cdp_calls.append((self.current_window_handle, cmd))
+        if cmd == "Performance.getMetrics":
+            return {"metrics": [{"name": "JSHeapUsedSize", "value": self.heap_bytes}]}
+        return {}
+
+    def _check_crash(self):
+        if self.crashed:
+            raise WebDriverException("unknown error: session deleted because of page crash\nfrom tab crashed")
+
+    def execute_script(self, script, *args):
+        self._call("execute_script")
+        self._check_crash()
+        if "performance.timeOrigin" in script:
+            return {"now": time.time() * 1000, "frames": dict(self.probes)}  # health probe
+        if "data-window" in script:
+            return self.grids.get(self.current_window_handle)  # grid adoption
+        if "moveBefore" in script:
+            return "moved"  # standby swap
+        if "updateChart" in script:
+            self.frames.update(dict(args[0]))  # hidden-page reloads (loaded "instantly")
+            return None
+        if "__chartSymbol" in script and args and isinstance(args[0], list):
+            return {fid: f"NSE:{self.frames[fid]}" if fid in self.frames else None for fid in args[0]}
+        if "__chartSymbol" in script:
+            return "confirmed"
+        if "querySelector('.grid-page.active-page')" in script:
+            return 0  # user is on page 1
+        if any(probe in script for probe in READY_PROBES):
+            return True
+        return None
+
+    def set_script_timeout(self, seconds):
+        self._call("set_script_timeout")
+
+    def execute_async_script(self, script, *args):
+        self._call("execute_async_script")
+        self._check_crash()
+        if "setSymbol" not in script:
+            return {}
+        updates, concurrency = args[0], args[2] if len(args) > 2 else 1
+        # Charts load side by side, `concurrency` at a time
+        time.sleep(self.frame_latency * -(-len(updates) // max(1, concurrency)))
+        results = {}
+        for fid, symbol in updates:
+            ok = self.random.random() >= self.api_failure_rate
+            if ok:
+                self.frames[fid] = symbol
+            results[fid] = {"symbol": f"NSE:{symbol}" if ok else None, "ms": self.frame_latency * 1000}
+        return results
+
+    def execute(self, command, params=None):
+        # ActionChains.perform() lands here
+        self._call(f"execute:{command}")
+        return {"value": None}
+
+    def find_element(self, by, value):
+        self._call("find_element")
+        return FakeElement(self, (by, value))
+
+    def find_elements(self, by, value):
+        self._call("find_elements")
+        return [FakeElement(self, (by, value))]
+
+    def get_log(self, log_type):
+        self._call("get_log")
+        return []
+
+    def quit(self):
+        self._call("quit")
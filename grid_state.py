@@ -0,0 +1,50 @@
+"""
+Crash-safe persistence of the grid layout.
+
+After every update the symbol -> frame map and the last ranking are written to
+STATE_FILE (temp file + fsync + rename, so a crash mid-write leaves the previous
+state intact). A restarted process, or an in-process browser restart, seeds the
+slot map from it and builds the grid with the real symbol URLs in one
+init_grid, instead of loading NIFTY everywhere and retyping every chart.
+"""
+import os
+import json
+import time
+import logging
+
+STATE_FILE = os.environ.get("STATE_FILE", "state.json")
+STATE_MAX_AGE = 12 * 3600  # seconds; older layouts are not restored
+
+
+def save_state(shown, ranking, chart_url, path=STATE_FILE):
+    state = {
+        "saved_at": round(time.time(), 3),
+        "chart_url": chart_url,
+        "shown": shown,
+        "ranking": list(ranking),
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_state(chart_url, path=STATE_FILE, max_age=STATE_MAX_AGE):
+    """The saved state for `chart_url`, or None when missing, unreadable, stale or for another chart site."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable grid state {path}: {e}")
+        return None
+    if state.get("chart_url") != chart_url or not state.get("shown"):
+        return None
+    age = time.time() - state.get("saved_at", 0)
+    if age > max_age:
+        logging.info(f"Grid state in {path} is {age / 3600:.1f} h old, not restoring.")
+        return None
+    return state
@@ -0,0 +1,287 @@
+"""
+Self-healing frame health monitor.
+
+A background thread drains the CDP event stream (Network/Page events from the
+ChromeDriver performance log) and the browser console log into a bounded ring
+buffer. Events that point at a broken chart (a frame document that failed or
+returned an error, a frame navigated off the chart host, SEVERE console
+errors) trigger an immediate health probe; otherwise the grid is probed every
+PROBE_INTERVAL seconds.
+
+The probe is ONE execute_script per grid window that reads every chart
+frame's markers (see readiness.FRAME_MARKERS_JS): chart symbol, heartbeat, last
+render, uncaught errors. Each frame is classified and only the broken ones are
+repaired, without waiting for the next refresh cycle:
+
+    wrong_symbol   chart shows another symbol than its slot    -> retype via the chart API
+    no_chart       loaded long ago but never drew a canvas     -> reload the frame
+    stalled        visible but its event loop stopped ticking  -> reload the frame
+    lost           frame navigated off the chart site          -> reload the frame
+    crashed        the grid window's renderer is gone          -> restart the browser
+
+A crashed renderer ("Aw, Snap") keeps its DevTools target, so the watchdog's
+target check still passes; the probe is what notices it. The monitor marks the
+watchdog dead and the main loop restarts the browser and restores the grid.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from urllib.parse import quote, urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+import metrics
+
+EVENT_POLL_INTERVAL = 1.0  # seconds between event log drains
+PROBE_INTERVAL = 10  # seconds between routine probes when no event asks for one
+LOAD_GRACE = 30  # seconds a frame may take to draw its first chart
+STALL_AFTER = 15  # seconds without a heartbeat before a visible frame counts as frozen
+SYMBOL_GRACE = 5  # seconds after a symbol load before a mismatch counts
+REPAIR_LIMIT = 3  # repairs per frame per REPAIR_WINDOW, then it is left to the next cycle
+REPAIR_WINDOW = 600
+RING_SIZE = 500
+# WebDriver errors that mean the page's renderer died (chromedriver wording varies by version)
+CRASH_MARKERS = ("tab crashed", "target crashed", "page crash")
+
+# arguments[0]: chart host. Returns {now: ms, frames: {frame_id: state}} for every grid frame.
+HEALTH_PROBE_JS = """
+var host = arguments[0], now = Date.now(), frames = {};
+document.querySelectorAll('.grid-page iframe').forEach(function(f) {
+    var s = {visible: f.parentNode.classList.contains('active-page'), symbol: f.getAttribute('data-symbol')};
+    frames[f.id] = s;
+    if (f.hasAttribute('data-pending-src') || f.getAttribute('src') === 'about:blank') { s.state = 'unloaded'; return; }
+    try {
+        var w = f.contentWindow, loc = w.location;
+        if (!loc.host) { s.state = 'loading'; return; }
+        if (loc.host !== host) { s.state = 'away'; s.url = loc.href; return; }
+        s.state = 'live';
+        s.age = now - w.performance.timeOrigin;
+        s.canvas = w.__canvasReady === true;
+        s.active = w.__chartSymbol || null;
+        s.loadedAt = w.__symbolLoadedAt || null;
+        s.heartbeat = w.__heartbeat || null;
+        s.render = w.__lastRender || null;
+        s.errors = w.__errors || 0;
+        s.lastError = w.__lastError || null;
+    } catch (e) {
+        // Cross-origin: the frame was redirected (login page, error page)
+        s.state = 'away';
+    }
+});
+return {now: now, frames: frames};
+"""
+
+# arguments: frame id, url. Reloads one chart frame in place.
+RELOAD_FRAME_JS = """
+var el = document.getElementById(arguments[0]);
+if (!el) return false;
+el.removeAttribute('data-pending-src');
+el.src = arguments[1];
+return true;
+"""
+
+
+def is_crash(error):
+    return any(marker in str(error).lower() for marker in CRASH_MARKERS)
+
+
+class FrameHealth:
+    def __init__(self, fid):
+        self.fid = fid
+        self.status = "unknown"
+        self.symbol = None  # symbol the chart reports
+        self.last_render = None  # epoch ms of the last painted frame (visible page only)
+        self.errors = 0
+        self.last_error = None
+        self.repairs = deque()  # monotonic times of recent repairs
+
+    def __repr__(self):
+        return f"FrameHealth({self.fid}, {self.status}, {self.symbol}, errors={self.errors})"
+
+
+class HealthMonitor:
+    def __init__(self, grid, probe_interval=PROBE_INTERVAL):
+        self.grid = grid
+        self.probe_interval = probe_interval
+        self.chart_host = urlparse(grid.chart_url).netloc
+        self.frames = {fid: FrameHealth(fid) for fid in grid.frame_pages}
+        self.events = deque(maxlen=RING_SIZE)  # (epoch s, source, detail)
+        self.pump = None
+        self.probe_due = True
+        self.last_probe = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="frame-health", daemon=True)
+        self.thread.start()
+        logging.info("Frame health monitor started.")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def run(self):
+        while not self.stop_event.wait(EVENT_POLL_INTERVAL):
+            try:
+                self.tick()
+            except Exception as e:
+                logging.warning(f"Health monitor tick failed: {e}")
+
+    def tick(self):
+        if not self.grid.is_initialized or not self.grid.watchdog.alive():
+            return
+        self.drain_events()
+        if self.probe_due or time.monotonic() - self.last_probe >= self.probe_interval:
+            # Never wait behind a grid update: it is rewriting frames anyway
+            if not self.grid.driver_lock.acquire(timeout=0.2):
+                return
+            try:
+                self.check()
+            finally:
+                self.grid.driver_lock.release()
+
+    # --- Event stream ---------------------------------------------------------
+
+    def note(self, source, detail):
+        self.events.append((time.time(), source, detail))
+
+    def on_event(self, method, params):
+        if method == "Network.loadingFailed" and params.get("type") == "Document":
+            if not params.get("canceled") and not params.get("blockedReason"):
+                self.note("network", f"document load failed: {params.get('errorText')}")
+                self.probe_due = True
+        elif method == "Network.responseReceived" and params.get("type") == "Document":
+            response = params.get("response", {})
+            if response.get("status", 200) >= 400:
+                self.note("network", f"HTTP {response.get('status')} for {response.get('url')}")
+                self.probe_due = True
+        elif method == "Page.frameNavigated":
+            frame = params.get("frame", {})
+            host = urlparse(frame.get("url", "")).netloc
+            if frame.get("parentId") and host and host != self.chart_host:
+                self.note("page", f"chart frame navigated to {frame.get('url')}")
+                self.probe_due = True
+        elif method == "Page.frameDetached":
+            self.note("page", f"frame detached: {params.get('frameId')}")
+
+    def drain_events(self):
+        if self.pump is None or self.pump.driver is not self.grid.driver:
+            self.pump = self.grid.network_tracker().pump
+            self.pump.subscribe(self.on_event)
+        self.pump.poll()
+        try:
+            entries = self.grid.driver.get_log("browser")
+        except Exception:
+            entries = []
+        for entry in entries:
+            if "SEVERE" in str(entry.get("level")):
+                self.note("console", entry.get("message"))
+                self.probe_due = True
+
+    # --- Probe + repair -------------------------------------------------------
+
+    def check(self):
+        self.probe_due = False
+        self.last_probe = time.monotonic()
+        now = time.time() * 1000
+        states = {}
+        with metrics.span("health_probe"):
+            for window in range(len(self.grid.grid_handles)):
+                self.grid.focus_window(window)
+                try:
+                    result = self.grid.driver.execute_script(HEALTH_PROBE_JS, self.chart_host) or {}
+                except WebDriverException as e:
+                    if not is_crash(e):
+                        raise
+                    return self.crashed(window, e)
+                now = result.get("now", now)
+                states.update(result.get("frames", {}))
+
+        verdicts = {}
+        for fid, state in states.items():
+            health = self.frames.setdefault(fid, FrameHealth(fid))
+            # A pending reload showing its symbol is confirmed first, so it is judged against it
+            self.grid.confirm_reload(fid, state.get("active"))
+            verdict = self.assess(state, now, self.grid.slots.shown.get(fid))
+            if verdict != health.status:
+                if verdict not in ("ok", "loading", "unloaded"):
+                    logging.warning(f"Frame {fid} is {verdict} (symbol {state.get('symbol')}).")
+                self.note("health", f"{fid}: {health.status} -> {verdict}")
+            health.status = verdict
+            health.symbol = state.get("active") or health.symbol
+            health.last_render = state.get("render") or health.last_render
+            if state.get("errors", 0) > health.errors:
+                health.last_error = state.get("lastError")
+            health.errors = state.get("errors", health.errors)
+            verdicts[fid] = verdict
+
+        broken = [fid for fid, verdict in verdicts.items() if verdict in ("wrong_symbol", "no_chart", "stalled", "lost")]
+        live = [fid for fid, verdict in verdicts.items() if verdict not in ("unloaded", "loading")]
+        lost = [fid for fid in broken if verdicts[fid] == "lost"]
+        if live and len(lost) * 2 >= len(live):
+            # Most charts left the chart site at once: the session expired, reloading won't help
+            logging.warning(f"{len(lost)}/{len(live)} chart frames left {self.chart_host}. Dhan session logged out? Not reloading.")
+            broken = [fid for fid in broken if verdicts[fid] != "lost"]
+        for fid in broken:
+            self.grid.focus_window(self.grid.layout.frame_window.get(fid, 0))
+            self.repair(fid, verdicts[fid], states[fid])
+        self.grid.focus_window(0)
+        return verdicts
+
+    def crashed(self, window, error):
+        """Renderer of grid window `window` is gone: every frame is lost until the browser restarts."""
+        verdicts = {}
+        for fid, health in self.frames.items():
+            if self.grid.layout.frame_window.get(fid, 0) == window:
+                health.status = "crashed"
+                verdicts[fid] = "crashed"
+        self.note("health", f"grid window {window + 1} crashed: {str(error).splitlines()[0]}")
+        metrics.record("frame_repair", 0, frame=f"window-{window}", reason="crashed", action="restart")
+        self.grid.watchdog.kill(f"grid window {window + 1} crashed (renderer gone).")
+        return verdicts
+
+    def assess(self, state, now, expected):
+        kind = state.get("state")
+        if kind in ("unloaded", "loading"):
+            return kind
+        if kind == "away":
+            return "lost"
+        if not state.get("canvas"):
+            return "no_chart" if state.get("age", 0) > LOAD_GRACE * 1000 else "loading"
+        heartbeat = state.get("heartbeat")
+        if state.get("visible") and heartbeat and now - heartbeat > STALL_AFTER * 1000:
+            return "stalled"
+        active, loaded_at = state.get("active"), state.get("loadedAt")
+        if expected and active and loaded_at and now - loaded_at > SYMBOL_GRACE * 1000:
+            if active.split(":")[-1].upper() != expected.upper():
+                return "wrong_symbol"
+        return "ok"
+
+    def repair(self, fid, verdict, state):
+        health = self.frames[fid]
+        cutoff = time.monotonic() - REPAIR_WINDOW
+        while health.repairs and health.repairs[0] < cutoff:
+            health.repairs.popleft()
+        if len(health.repairs) >= REPAIR_LIMIT:
+            return
+        health.repairs.append(time.monotonic())
+
+        symbol = self.grid.slots.shown.get(fid) or state.get("symbol") or "NIFTY"
+        started = time.perf_counter()
+        action = "reload"
+        if verdict == "wrong_symbol":
+            result = self.grid.set_symbols_api([(fid, symbol)]).get(fid) or {}
+            active = result.get("symbol")
+            if active and active.split(":")[-1].upper() == symbol.upper():
+                action = "retype"
+        if action == "reload":
+            self.grid.driver.execute_script(RELOAD_FRAME_JS, fid, f"{self.grid.chart_url}/?symbol={quote('NSE:' + symbol, safe=':')}")
+        metrics.record("frame_repair", (time.perf_counter() - started) * 1000, frame=fid, reason=verdict, action=action)
+        self.note("repair", f"{fid}: {action} {symbol} ({verdict})")
+        logging.info(f"Repaired {fid}: {action} -> {symbol} ({verdict}).")
@@ -0,0 +1,199 @@
+"""
+Local instrument master: NSE symbol -> Dhan exchange / security id.
+
+Dhan publishes its full scrip master as a CSV. It is downloaded at most once a
+day (IST), reduced to the NSE equities and indices and pickled to
+INSTRUMENT_CACHE, so a restart loads the index in milliseconds without the
+network. Every symbol coming from NSE is resolved with a dict lookup before it
+is dispatched to a chart frame; symbols Dhan does not list are dropped and
+reported instead of costing a frame update and leaving a wrong chart up.
+
+The daily refresh downloads on a background thread while lookups keep using
+the cached index; a failed download is retried after REFRESH_BACKOFF, not on
+every cycle.
+
+Renamed tickers can be mapped in INSTRUMENT_ALIASES_FILE, one "OLD NEW" pair
+per line (# comments allowed).
+
+Check symbols by hand:
+    python instruments.py SBIN IDEA-EQ SOMETHINGELSE
+"""
+import io
+import os
+import csv
+import time
+import pickle
+import logging
+import threading
+import argparse
+from collections import namedtuple
+from datetime import datetime
+
+import requests
+
+import metrics
+from scheduler import IST
+
+INSTRUMENT_MASTER_URL = os.environ.get("INSTRUMENT_MASTER_URL", "https://images.dhan.co/api-data/api-scrip-master.csv")
+INSTRUMENT_CACHE = os.environ.get("INSTRUMENT_CACHE", "instrument_master.pkl")
+INSTRUMENT_ALIASES_FILE = os.environ.get("INSTRUMENT_ALIASES_FILE", "instrument_aliases.txt")
+DOWNLOAD_TIMEOUT = 60  # seconds, the full master is tens of MB
+REFRESH_BACKOFF = 15 * 60  # seconds before retrying a failed download
+
+# Series NSE (or a table cell) may append to a symbol: "IDEA-EQ", "ZEEL BE"
+SERIES_SUFFIXES = {"EQ", "BE", "BZ", "BL", "SM", "ST", "IL", "GB", "N1", "N2"}
+# Preferred series when Dhan lists a symbol more than once
+SERIES_PRIORITY = {"EQ": 0, "BE": 1}
+
+Instrument = namedtuple("Instrument", ["symbol", "exchange", "security_id", "kind", "series"])
+
+
+def parse_master(text):
+    """Dhan scrip master CSV -> {trading symbol: Instrument} for NSE equities and indices."""
+    index = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        if row.get("SEM_EXM_EXCH_ID") != "NSE":
+            continue
+        kind = row.get("SEM_INSTRUMENT_NAME")
+        if kind not in ("EQUITY", "INDEX"):
+            continue
+        symbol = (row.get("SEM_TRADING_SYMBOL") or "").strip().upper()
+        if not symbol:
+            continue
+        item = Instrument(symbol, "NSE", row.get("SEM_SMST_SECURITY_ID", "").strip(), kind, (row.get("SEM_SERIES") or "").strip())
+        current = index.get(symbol)
+        if current is None or SERIES_PRIORITY.get(item.series, 9) < SERIES_PRIORITY.get(current.series, 9):
+            index[symbol] = item
+    return index
+
+
+def load_aliases(path=INSTRUMENT_ALIASES_FILE):
+    aliases = {}
+    if not os.path.exists(path):
+        return aliases
+    with open(path) as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if len(parts) == 2:
+                aliases[parts[0].upper()] = parts[1].upper()
+    return aliases
+
+
+def today_ist():
+    return datetime.now(IST).date().isoformat()
+
+
+class InstrumentMaster:
+    def __init__(self, url=INSTRUMENT_MASTER_URL, cache_path=INSTRUMENT_CACHE, aliases_path=INSTRUMENT_ALIASES_FILE):
+        self.url = url
+        self.cache_path = cache_path
+        self.aliases = load_aliases(aliases_path)
+        self.index = {}
+        self.day = None  # IST date the index was downloaded
+        self.reported = set()  # unresolvable symbols already warned about
+        self.refresh_thread = None
+        self.failed_at = None  # monotonic time of the last failed download
+
+    def load(self):
+        """Loads the pickled index, downloading a fresh master if it is missing or from an earlier day."""
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "rb") as f:
+                    cached = pickle.load(f)
+                self.index, self.day = cached["index"], cached["day"]
+                logging.info(f"Instrument master loaded from cache ({len(self.index)} NSE instruments, {self.day}).")
+            except Exception as e:
+                logging.warning(f"Instrument cache unreadable ({e}), downloading.")
+        # Without any index there is nothing to serve meanwhile, so the first download blocks
+        self.refresh_if_stale(background=bool(self.index))
+
+    def refresh_if_stale(self, background=True):
+        """
+        Downloads today's master if the index is from an earlier day. In the background (default)
+        this returns at once and lookups keep using the current index until the download lands.
+        """
+        if self.day == today_ist():
+            return
+        if self.refresh_thread and self.refresh_thread.is_alive():
+            return
+        if self.failed_at is not None and time.monotonic() - self.failed_at < REFRESH_BACKOFF:
+            return
+        if not background:
+            self._refresh()
+            return
+        self.refresh_thread = threading.Thread(target=self._refresh, name="instrument-master", daemon=True)
+        self.refresh_thread.start()
+
+    def _refresh(self):
+        try:
+            with metrics.span("instrument_master_download"):
+                self.download()
+            self.failed_at = None
+        except Exception as e:
+            # Keep yesterday's index (or pass-through if there is none) rather than blocking the grid
+            self.failed_at = time.monotonic()
+            logging.warning(f"Instrument master download failed, retrying in {REFRESH_BACKOFF // 60} min: {e}")
+
+    def download(self):
+        started = time.perf_counter()
+        resp = requests.get(self.url, timeout=DOWNLOAD_TIMEOUT)
+        resp.raise_for_status()
+        index = parse_master(resp.text)
+        if not index:
+            raise Exception("no NSE instruments in the scrip master")
+        # Swapped whole, so lookups on other threads see either the old index or the new one
+        self.index, self.day = index, today_ist()
+        self.reported = set()
+
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"day": self.day, "index": self.index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.cache_path)
+        logging.info(f"Instrument master refreshed: {len(index)} NSE instruments in {time.perf_counter() - started:.1f}s.")
+
+    def resolve(self, symbol):
+        """Instrument for an NSE symbol (series suffixes and aliases handled), or None."""
+        key = symbol.strip().upper()
+        item = self.index.get(self.aliases.get(key, key))
+        if item is None:
+            for sep in ("-", " "):
+                base, _, suffix = key.rpartition(sep)
+                if base and suffix in SERIES_SUFFIXES:
+                    item = self.index.get(self.aliases.get(base, base))
+                    break
+        return item
+
+    def resolve_all(self, symbols):
+        """
+        Dhan trading symbols for `symbols`, in order and de-duplicated. Unresolvable ones are
+        dropped and reported once per day. Without an index (never downloaded) symbols pass through.
+        """
+        if not self.index:
+            return list(symbols)
+        resolved, missing = [], []
+        for symbol in symbols:
+            item = self.resolve(symbol)
+            if item is None:
+                missing.append(symbol)
+            elif item.symbol not in resolved:
+                resolved.append(item.symbol)
+        new = [sym for sym in missing if sym not in self.reported]
+        if new:
+            self.reported.update(new)
+            logging.warning(f"Not listed on Dhan, skipped: {', '.join(new)}")
+        return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve NSE symbols against the Dhan instrument master.")
+    parser.add_argument("symbols", nargs="+")
+    args = parser.parse_args()
+    master = InstrumentMaster()
+    master.load()
+    for symbol in args.symbols:
+        item = master.resolve(symbol)
+        print(f"{symbol:<20} " + (f"{item.exchange}:{item.symbol}  security_id={item.security_id}  {item.kind} {item.series}" if item else "NOT FOUND"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Grid layout model and the templates of the injected grid document.
+
+One config describes the whole grid: ROWS x COLS charts per page, PAGES pages
+per browser window and one window per monitor. Frame ids, the frame -> page /
+window maps, the CSS grid and the document written into each window are all
+derived from it, so 48 or 60 charts across two screens is a config change:
+
+    GRID_ROWS=2 GRID_COLS=3 GRID_PAGES=4 GRID_WINDOWS="0,0,1920,1080;1920,0,1920,1080"
+
+Pages are numbered globally (window 0 holds pages 0..PAGES-1, window 1 the
+next PAGES, ...), so frame ids stay unique across windows and the default
+single-window 2x3x4 layout keeps the historical "chart-frame-<page>-<slot>" ids.
+
+The document is built from string.Template objects compiled once at import.
+Layout changes on a live grid are applied with LAYOUT_PATCH_JS, which only
+adds/removes the pages and frames that differ and leaves every other chart
+loaded.
+
+Preview a layout without Dhan or Selenium:
+    python layout.py --html dashboard.html --rows 4 --cols 5 --pages 1
+"""
+import html
+import json
+import argparse
+from string import Template
+from collections import namedtuple
+from urllib.parse import quote
+
+Slot = namedtuple("Slot", ["fid", "window", "page", "index"])
+
+
+def parse_windows(spec):
+    """'x,y,w,h;x,y,w,h' -> [(x, y, w, h), ...]. Empty spec -> one window placed by the OS."""
+    rects = []
+    for part in spec.split(";"):
+        if part.strip():
+            x, y, w, h = (int(v) for v in part.split(","))
+            rects.append((x, y, w, h))
+    return rects or [None]
+
+
+# --- Templates (compiled once) ------------------------------------------------
+
+GRID_STYLE = """
+    body { margin: 0; overflow: hidden; background: #000; font-family: sans-serif; }
+    .tab-bar { position: absolute; top: 0; left: 0; width: 100%; height: 35px; background: #222; display: flex; z-index: 100000; border-bottom: 2px solid #444; }
+    .tab-btn { flex: 1; border: none; background: #333; color: #fff; cursor: pointer; border-right: 1px solid #444; font-size: 14px; text-transform: uppercase; letter-spacing: 1px; }
+    .tab-btn:hover { background: #444; }
+    .tab-btn.active { background: #007bff; font-weight: bold; color: white; }
+    .grid-page { display: none; width: 100vw; height: calc(100vh - 35px); margin-top: 35px; gap: 2px; background: #111; }
+    .grid-page.active-page { display: grid; }
+    iframe { width: 100%; height: 100%; border: none; background: #000; }
+"""
+
+LAYOUT_STYLE = Template(".grid-page { grid-template-columns: repeat($cols, 1fr); grid-template-rows: repeat($rows, 1fr); }")
+
+GRID_SCRIPTS = Template("""
+    // Helper to load a tab's iframes with STAGGERED delay
+    window.loadTab = function(index) {
+        let container = document.getElementById('tab-' + index);
+        if(!container) return;
+        let frames = container.querySelectorAll('iframe');
+        frames.forEach((iframe, i) => {
+            let pending = iframe.getAttribute('data-pending-src');
+            if(pending) {
+                // Stagger load by 300ms per frame to prevent CPU choke
+                setTimeout(() => {
+                    iframe.src = pending;
+                    iframe.removeAttribute('data-pending-src');
+                }, i * 300);
+            }
+        });
+    };
+
+    // Last time each page was shown (used by the memory governor to pick LRU pages)
+    window.tabViewedAt = {$first_page: Date.now()};
+
+    window.showTab = function(index) {
+        window.tabViewedAt[index] = Date.now();
+        document.querySelectorAll('.grid-page').forEach(el => el.classList.remove('active-page'));
+        document.querySelectorAll('.tab-btn').forEach(el => el.classList.remove('active'));
+        document.getElementById('tab-' + index).classList.add('active-page');
+        document.getElementById('btn-' + index).classList.add('active');
+
+        // On-Demand Load (Staggered)
+        window.loadTab(index);
+    };
+
+    // Smart Update: Handles both loaded and pending frames
+    window.updateChart = function(id, symbol) {
+        let el = document.getElementById(id);
+        if(el) {
+            let newSrc = window.CHART_URL + "/?symbol=NSE:" + encodeURIComponent(symbol);
+
+            if (el.hasAttribute('data-pending-src')) {
+                el.setAttribute('data-pending-src', newSrc);
+                el.setAttribute('data-symbol', symbol);
+            }
+            else if(el.getAttribute('data-symbol') !== symbol) {
+                el.src = newSrc;
+                el.setAttribute('data-symbol', symbol);
+            }
+        }
+    };
+
+    // The first page is injected live; this only catches stragglers
+    window.loadTab($first_page);
+""")
+
+GRID_DOCUMENT = Template(
+    '<div id="custom-ui" data-window="$window" data-layout="$signature" '
+    'style="position:absolute; top:0; left:0; width:100%; height:100%; z-index:99999; background:#000;">'
+    '<style>$style</style><style id="grid-layout-style">$layout_style</style>'
+    '<link rel="preconnect" href="$chart_url">'
+    '<script>window.CHART_URL = "$chart_url";$scripts</script>'
+    '<div class="tab-bar">$tabs</div>'
+    '$pages$extra'
+    '</div>'
+)
+TAB = Template('<button id="btn-$page" class="tab-btn $active" onclick="showTab($page)">PAGE $label</button>')
+PAGE = Template('<div id="tab-$page" class="grid-page $active">$frames</div>')
+# First page of a window: direct injection (critical path). Other pages: deferred, loaded on first view.
+FRAME_LIVE = Template('<iframe id="$fid" src="$src" $tag allow="autoplay; encrypted-media"></iframe>')
+FRAME_DEFERRED = Template('<iframe id="$fid" src="about:blank" data-pending-src="$src" $tag allow="autoplay; encrypted-media"></iframe>')
+
+# arguments[0]: patch spec from Layout.patch_spec(). Adds missing pages/frames, removes the ones
+# the new layout dropped and swaps the CSS grid + tab bar; existing frames are never reloaded.
+LAYOUT_PATCH_JS = """
+var spec = arguments[0], ui = document.getElementById('custom-ui');
+if (!ui) return false;
+var fragment = function(html) {
+    var holder = document.createElement('div');
+    holder.innerHTML = html;
+    return holder.firstChild;
+};
+// Grids written before layouts existed have neither element id
+var style = document.getElementById('grid-layout-style');
+if (!style) {
+    style = ui.appendChild(document.createElement('style'));
+    style.id = 'grid-layout-style';
+}
+style.textContent = spec.style;
+ui.querySelector('.tab-bar').innerHTML = spec.tabs;
+var anchor = document.getElementById('standby-pool');
+var wanted = {};
+spec.pages.forEach(function(p) {
+    wanted[p.id] = true;
+    var page = document.getElementById(p.id);
+    if (!page) {
+        ui.insertBefore(fragment(p.html), anchor);
+        return;
+    }
+    var keep = {};
+    p.frames.forEach(function(f) {
+        keep[f[0]] = true;
+        if (!document.getElementById(f[0])) page.appendChild(fragment(f[1]));
+    });
+    Array.prototype.slice.call(page.querySelectorAll('iframe')).forEach(function(el) {
+        if (!keep[el.id]) el.remove();
+    });
+});
+Array.prototype.slice.call(ui.querySelectorAll('.grid-page')).forEach(function(page) {
+    if (!wanted[page.id]) page.remove();
+});
+if (!ui.querySelector('.grid-page.active-page')) window.showTab(spec.first_page);
+else {
+    // The new tab bar marks the first page active: move that to the page on screen, and load
+    // the frames just added to it (loadTab only touches frames still pending)
+    var active = ui.querySelector('.grid-page.active-page').id.split('-')[1];
+    ui.querySelectorAll('.tab-btn').forEach(function(el) { el.classList.remove('active'); });
+    var btn = document.getElementById('btn-' + active);
+    if (btn) btn.classList.add('active');
+    window.loadTab(active);
+}
+ui.setAttribute('data-layout', spec.signature);
+return true;
+"""
+
+
+class Layout:
+    def __init__(self, rows, cols, pages, windows=(None,)):
+        if min(rows, cols, pages, len(windows)) < 1:
+            raise ValueError("Layout needs at least one row, column, page and window")
+        self.rows = rows
+        self.cols = cols
+        self.pages = pages  # per window
+        self.windows = list(windows)  # (x, y, w, h) or None per browser window
+        self.per_page = rows * cols
+
+        # Rank order: the visible first page of every window fills first, then the second pages, ...
+        self.slots = [
+            Slot(f"chart-frame-{w * pages + p}-{i}", w, w * pages + p, i)
+            for p in range(pages)
+            for w in range(len(self.windows))
+            for i in range(self.per_page)
+        ]
+        self.frame_ids = [slot.fid for slot in self.slots]
+        self.frame_pages = {slot.fid: slot.page for slot in self.slots}
+        self.frame_window = {slot.fid: slot.window for slot in self.slots}
+        self.size = len(self.slots)
+
+    def __repr__(self):
+        return f"Layout({self.signature()}, {self.size} charts)"
+
+    def signature(self):
+        return f"{self.rows}x{self.cols}x{self.pages}x{len(self.windows)}"
+
+    def window_pages(self, window):
+        return list(range(window * self.pages, (window + 1) * self.pages))
+
+    def page_frames(self, page):
+        return [f"chart-frame-{page}-{i}" for i in range(self.per_page)]
+
+    # --- Rendering ----------------------------------------------------------------
+
+    def _frame(self, fid, chart_url, shown, live):
+        symbol = shown.get(fid)
+        # Restored grid: the frame's saved symbol straight away (no retyping).
+        # Otherwise generic NIFTY URL to guarantee Toolbar/Search Button loads
+        fields = {
+            "fid": fid,
+            # Symbols like M&M must survive both the query string and the attribute
+            "src": html.escape(f"{chart_url}/?symbol={quote('NSE:' + (symbol or 'NIFTY'), safe=':')}", quote=True),
+            "tag": f'data-symbol="{html.escape(symbol, quote=True)}"' if symbol else "",
+        }
+        return (FRAME_LIVE if live else FRAME_DEFERRED).substitute(fields)
+
+    def _page(self, page, chart_url, shown, first):
+        # Every slot gets a chart (even beyond the initial list) so the slot map can hand
+        # any frame to a symbol entering the list later.
+        frames = "".join(self._frame(fid, chart_url, shown, page == first) for fid in self.page_frames(page))
+        return PAGE.substitute(page=page, active="active-page" if page == first else "", frames=frames)
+
+    def _tabs(self, window):
+        pages = self.window_pages(window)
+        return "".join(
+            TAB.substitute(page=page, active="active" if page == pages[0] else "", label=n + 1)
+            for n, page in enumerate(pages)
+        )
+
+    def _layout_style(self):
+        return LAYOUT_STYLE.substitute(rows=self.rows, cols=self.cols)
+
+    def render_window(self, window, chart_url, shown=None, extra_style="", extra_html=""):
+        """The grid document for one browser window. `shown` maps frame id -> symbol to load directly."""
+        shown = shown or {}
+        pages = self.window_pages(window)
+        return GRID_DOCUMENT.substitute(
+            window=window,
+            signature=self.signature(),
+            style=GRID_STYLE + extra_style,
+            layout_style=self._layout_style(),
+            chart_url=chart_url,
+            scripts=GRID_SCRIPTS.substitute(first_page=pages[0]),
+            tabs=self._tabs(window),
+            pages="".join(self._page(page, chart_url, shown, pages[0]) for page in pages),
+            extra=extra_html,
+        )
+
+    def patch_spec(self, window, chart_url, shown=None):
+        """Argument for LAYOUT_PATCH_JS: everything the window should contain under this layout."""
+        shown = shown or {}
+        pages = self.window_pages(window)
+        return {
+            "signature": self.signature(),
+            "style": self._layout_style(),
+            "tabs": self._tabs(window),
+            "first_page": pages[0],
+            "pages": [
+                {
+                    "id": f"tab-{page}",
+                    "html": self._page(page, chart_url, shown, None),
+                    "frames": [[fid, self._frame(fid, chart_url, shown, False)] for fid in self.page_frames(page)],
+                }
+                for page in pages
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a static preview of a grid layout (one window).")
+    parser.add_argument("--html", default="dashboard.html")
+    parser.add_argument("--rows", type=int, default=2)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--window", type=int, default=0)
+    parser.add_argument("--windows", default="", help="'x,y,w,h;...' one rect per browser window")
+    parser.add_argument("--chart-url", default="https://tv.dhan.co")
+    parser.add_argument("--symbols", default="", help="comma separated, filled in rank order")
+    args = parser.parse_args()
+
+    layout = Layout(args.rows, args.cols, args.pages, parse_windows(args.windows))
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    shown = dict(zip(layout.frame_ids, symbols))
+    with open(args.html, "w") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>")
+        f.write(layout.render_window(args.window, args.chart_url.rstrip("/"), shown))
+        f.write("</body></html>\n")
+    print(f"Wrote {args.html}: {layout}, window {args.window} ({json.dumps(layout.windows[args.window])}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import time
+import asyncio
 import logging
+import threading
 import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 import os
+from urllib.parse import urlparse
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -12,42 +14,417 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 
+from nse_client import NSEHttpClient, NSESessionRejected
+from nse_lists import MultiListFetcher, parse_weights
+from snapshot_store import SnapshotStore, SNAPSHOT_DIR
+from instruments import InstrumentMaster
+from block_profile import build_extension, extension_flags
+from health import HealthMonitor
+from driver_watchdog import DriverWatchdog
+import grid_state
+from slots import SlotAssigner
+from layout import Layout, parse_windows, LAYOUT_PATCH_JS
+from memory_governor import MemoryGovernor
+from standby import StandbyPool, POOL_STYLE
+from cdp_events import EventPump, NetworkTracker, enable_event_log
+from readiness import (
+    wait_for, js, network_idle, GRID_READY_JS, CANVAS_READY_JS,
+    FRAME_FOCUSED_JS, SEARCH_TYPED_JS, SYMBOL_LOADED_JS, FRAME_MARKERS_JS,
+)
+from debug_browser import ensure_debug_browser
+from table_parser import EXTRACT_SYMBOLS_JS, parse_symbols_fast
+import metrics
+from scheduler import RefreshScheduler, MarketCalendar, AlwaysOpen, BrowserClosed
+
 # --- Configuration ---
-REFRESH_INTERVAL = 300  # seconds (5 minutes)
-TOTAL_WINDOWS = 20
-GRID_ROWS = 4
-GRID_COLS = 5
+REFRESH_INTERVAL = 300  # seconds (5 minutes), ticks aligned to the wall clock
+MARKET_HOURS_ONLY = os.environ.get("MARKET_HOURS_ONLY", "1") != "0"  # idle outside NSE sessions
+CHART_BASE_URL = os.environ.get("DHAN_CHART_URL", "https://tv.dhan.co")  # stub_server.py serves a fake at /chart
+PROFILE_DIR = f"{os.getcwd()}/user_data"
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", "0"))  # renderer JS heap budget, 0 = unlimited
+# Grid browser: "launch" starts a fresh Chrome per run, "attach" connects to (or starts)
+# a detached Chrome on DEBUG_PORT with the user_data profile, so restarts skip boot + login.
+BROWSER_MODE = os.environ.get("BROWSER_MODE", "launch")
+DEBUG_PORT = int(os.environ.get("DEBUG_PORT", "9222"))
+# Run NSE browser fetches (and the HTTP-mode fallback) in a tab of the grid browser
+# instead of booting a second Chrome.
+SHARE_BROWSER = os.environ.get("SHARE_BROWSER", "1") != "0"
+STANDBY_POOL_SIZE = int(os.environ.get("STANDBY_POOL_SIZE", "6"))  # hidden pre-loaded frames for ranks just below the grid
+SYMBOL_API_TIMEOUT = 8  # seconds to wait for one chart to confirm a programmatic symbol change
+UPDATE_CONCURRENCY = int(os.environ.get("UPDATE_CONCURRENCY", "6"))  # charts switched at once (any page)
+# declarativeNetRequest blocking in the grid browser (see block_profile.py): "off", "lean", "aggressive"
+BLOCK_PROFILE = os.environ.get("BLOCK_PROFILE", "lean")
+# Background monitor that reloads/retypes individual broken charts between refreshes (health.py)
+HEALTH_MONITOR = os.environ.get("HEALTH_MONITOR", "1") != "0"
+# When the browser or driver dies, relaunch it and rebuild the saved grid (grid_state.py)
+# instead of exiting. At most MAX_RESTARTS per hour, so a closed-for-good browser still stops us.
+AUTO_RESTART = os.environ.get("AUTO_RESTART", "1") != "0"
+MAX_RESTARTS = 5
+
+# NSE data source: "http" reads the JSON API behind the page (Chrome only as fallback),
+# "browser" always scrapes the rendered table with Selenium.
+FETCH_MODE = os.environ.get("NSE_FETCH_MODE", "http")
+NSE_BASE_URL = os.environ.get("NSE_BASE_URL", "https://www.nseindia.com")  # point at stub_server.py for offline runs
+NSE_PAGE_PATH = "/market-data/volume-gainers-spurts"
+NSE_API_PATH = "/api/live-analysis-volume-gainers"
+# HTTP mode merges several NSE lists, fetched in parallel, by weighted rank score
+# (see nse_lists.py), e.g. "volume_spurts=1,gainers=0.5,oi_spurts=0.4". A single list
+# (or "browser" mode) feeds the grid from the volume gainers page alone, as before.
+NSE_LIST_WEIGHTS = parse_weights(os.environ.get("NSE_LIST_WEIGHTS", ""))
+# Grid layout (layout.py): GRID_ROWS x GRID_COLS charts per page, GRID_PAGES pages per
+# browser window, one window per GRID_WINDOWS rect ("x,y,w,h;..." one per monitor,
+# empty = a single window). E.g. two 1920x1080 screens side by side at 2x3x4 = 48 charts:
+# GRID_WINDOWS="0,0,1920,1080;1920,0,1920,1080"
+GRID_ROWS = int(os.environ.get("GRID_ROWS", "2"))
+GRID_COLS = int(os.environ.get("GRID_COLS", "3"))
+GRID_PAGES = int(os.environ.get("GRID_PAGES", "4"))
+GRID_WINDOWS = parse_windows(os.environ.get("GRID_WINDOWS", ""))
+LAYOUT = Layout(GRID_ROWS, GRID_COLS, GRID_PAGES, GRID_WINDOWS)
+GRID_SLOTS = LAYOUT.size  # charts on the grid; the rest of the ranking feeds the standby pool
+# Every fetched table is appended to the snapshot store (SNAPSHOT_DIR, "" disables it).
+# With a persistence weight > 0 the merge favours symbols that were shown on the grid over
+# the last PERSISTENCE_WINDOW cycles (score += weight * share of those cycles).
+PERSISTENCE_WEIGHT = float(os.environ.get("PERSISTENCE_WEIGHT", "0"))
+PERSISTENCE_WINDOW = 12  # cycles (one hour at 5 minutes)
+
+# Changes a batch of frames through the TradingView widget living inside each iframe.
+# The frames are same-origin with the grid document, so this runs from the top document
+# in ONE round-trip: no frame switching, no tab switching, no focus games.
+# Up to `concurrency` charts (on any page, visible or not) load their new symbol at once.
+# Returns {frame_id: {symbol: active symbol read back from the chart (null on failure), ms: elapsed}}.
+SET_SYMBOLS_JS = """
+var updates = arguments[0], timeoutMs = arguments[1], concurrency = arguments[2];
+var done = arguments[arguments.length - 1];
+
+function setOne(fid, symbol) {
+    return new Promise(function(resolve) {
+        var el = document.getElementById(fid);
+        if (!el) return resolve(null);
+
+        // Page not opened yet: retarget the deferred load instead of touching a blank frame
+        if (el.hasAttribute('data-pending-src')) {
+            window.updateChart(fid, symbol);
+            return resolve(symbol);
+        }
+
+        var win, widget;
+        try {
+            win = el.contentWindow;
+            widget = win.tvWidget || win.widget;
+        } catch (e) { return resolve(null); }
+        if (!widget || !widget.activeChart) return resolve(null);
+
+        var finished = false;
+        var finish = function(result) {
+            if (finished) return;
+            finished = true;
+            clearTimeout(timer);
+            resolve(result);
+        };
+        var timer = setTimeout(function() { finish(null); }, timeoutMs);
+
+        var run = function() {
+            try {
+                var chart = widget.activeChart();
+                var confirm = function() {
+                    var active = chart.symbol();
+                    el.setAttribute('data-symbol', symbol);
+                    finish(active);
+                };
+                var ret = chart.setSymbol('NSE:' + symbol, confirm);
+                if (ret && ret.then) ret.then(confirm, function() { finish(null); });
+            } catch (e) { finish(null); }
+        };
+        if (widget.onChartReady) widget.onChartReady(run); else run();
+    });
+}
+
+(async function() {
+    var results = {}, next = 0;
+    // Each lane takes the next pending frame as soon as its current chart confirms
+    var lane = async function() {
+        while (next < updates.length) {
+            var update = updates[next++];
+            var started = performance.now();
+            var active = await setOne(update[0], update[1]);
+            results[update[0]] = {symbol: active, ms: performance.now() - started};
+        }
+    };
+    var lanes = [];
+    for (var k = 0; k < Math.min(concurrency, updates.length); k++) lanes.push(lane());
+    await Promise.all(lanes);
+    done(results);
+})();
+"""
+
+# Index of the page the user is looking at
+ACTIVE_PAGE_JS = """
+var page = document.querySelector('.grid-page.active-page');
+return page ? parseInt(page.id.split('-')[1], 10) : null;
+"""
+
+# arguments[0] = [[frame_id, symbol], ...]: reloads frames with the symbol in the chart URL
+RELOAD_CHARTS_JS = """
+arguments[0].forEach(function(update) { window.updateChart(update[0], update[1]); });
+"""
+
+# CSS to hide Top Header, Left Toolbar, and maximize chart area
+# ('Chart-Only' view, also removes the 'Sell/Buy' buttons)
+FRAME_HIDE_CSS = """
+    .layout__area--top, 
+    .header-chart-panel, 
+    .tv-header,
+    .chart-toolbar,
+    [data-role='toolbar'],
+    .drawing-toolbar,
+    .layout__area--left { 
+        display: none !important; 
+    }
+"""
+
+# Runs at document start in EVERY frame of the grid tab (registered once via CDP).
+# Only chart iframes are touched: the top-level grid/login page is left alone.
+FRAME_SETUP_JS = """
+(function() {
+    if (window === window.top || location.host !== '__CHART_HOST__') return;
+    if (window.__nseFrameSetup) return;
+    window.__nseFrameSetup = true;
+
+    // 1. HOTKEY KILLER (capture phase, registered before the chart's own listeners)
+    window.addEventListener('keydown', function(e) {
+        // Allow typing in INPUT fields
+        if(e.target.tagName === 'INPUT') return;
+        
+        // Block Dangerous Instant Orders: Shift + S (Sell), Shift + B (Buy)
+        // We allow plain 's' and 'b' so the user can Type-to-Search (e.g. 'SBIN')
+        var key = (e.key || '').toLowerCase();
+        if(e.shiftKey && (key === 's' || key === 'b')) {
+            e.stopImmediatePropagation();
+            e.preventDefault();
+            console.log('Blocked dangerous key: Shift + ' + key);
+        }
+        // Block Fullscreen 'f'
+        if(key === 'f') {
+            e.stopImmediatePropagation();
+            e.preventDefault();
+        }
+    }, true);
+
+    // 2. HIDE TOOLBARS (<head> may not exist yet at document start)
+    var style = document.createElement('style');
+    style.textContent = `""" + FRAME_HIDE_CSS + """`;
+    (document.head || document.documentElement).appendChild(style);
+""" + FRAME_MARKERS_JS + """
+})();
+"""
+
+# Returns {window, layout, symbols: {frame_id: data-symbol}} when a grid window is already on
+# this page (attach mode), else null.
+ADOPT_GRID_JS = """
+var ui = document.getElementById('custom-ui');
+if (!ui) return null;
+var symbols = {};
+document.querySelectorAll('.grid-page iframe').forEach(function(f) {
+    var symbol = f.getAttribute('data-symbol');
+    if (symbol) symbols[f.id] = symbol;
+});
+return {window: parseInt(ui.getAttribute('data-window') || '0', 10), layout: ui.getAttribute('data-layout'), symbols: symbols};
+"""
+
+# Adopted grid: reloads live chart frames that never ran FRAME_SETUP_JS (no hotkey guard, no
+# markers), e.g. because the previous session registered it on another tab. Returns how many.
+RELOAD_UNPREPARED_JS = """
+var reloaded = 0;
+document.querySelectorAll('.grid-page iframe').forEach(function(f) {
+    if (f.hasAttribute('data-pending-src') || f.getAttribute('src') === 'about:blank') return;
+    try {
+        var w = f.contentWindow;
+        if (!w.location.host || w.__nseFrameSetup) return;
+        var symbol = f.getAttribute('data-symbol');
+        if (symbol) f.src = window.CHART_URL + '/?symbol=NSE:' + encodeURIComponent(symbol);
+        else w.location.reload();
+        reloaded++;
+    } catch (e) {}
+});
+return reloaded;
+"""
+
+# arguments[0]: grid document html (see layout.Layout.render_window)
+WRITE_GRID_JS = "document.open(); document.write(arguments[0]); document.close();"
+
+# arguments[0] = [frame_id]: the symbol each chart reports loaded ({frame_id: symbol or null})
+READ_SYMBOLS_JS = """
+var symbols = {};
+arguments[0].forEach(function(id) {
+    var el = document.getElementById(id);
+    try { symbols[id] = (el && el.contentWindow.__chartSymbol) || null; } catch (e) { symbols[id] = null; }
+});
+return symbols;
+"""
+
+# arguments[0] = {frame_id: symbol}: records symbols switched by typing on the frame elements
+SYNC_SYMBOLS_JS = """
+var symbols = arguments[0];
+Object.keys(symbols).forEach(function(id) {
+    var el = document.getElementById(id);
+    if (el) el.setAttribute('data-symbol', symbols[id]);
+});
+"""
 
 # Logging setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class NSEFetcher:
-    def __init__(self):
-        self.url = "https://www.nseindia.com/market-data/volume-gainers-spurts"
+    def __init__(self, mode=FETCH_MODE, base_url=NSE_BASE_URL, shared_grid=None, weights=NSE_LIST_WEIGHTS, store=None):
+        self.mode = mode
+        self.shared_grid = shared_grid  # DhanGrid whose browser we borrow a tab from
+        self.handle = None
+        self.url = base_url.rstrip("/") + NSE_PAGE_PATH
+        self.http = NSEHttpClient(base_url, NSE_PAGE_PATH) if mode == "http" else None
+        enabled = [name for name, weight in weights.items() if weight > 0]
+        self.lists = MultiListFetcher(self.http, weights) if self.http and len(enabled) > 1 else None
+        self.store = store  # SnapshotStore that receives every fetched table
+        self.tables = {}  # list name -> rows of the last fetch
+        self.shown = []  # symbols on the grid, stored with each fetch as the "grid" list
         self.options = Options()
         # self.options.add_argument("--headless")  # DISABLED to avoid detection
         self.options.add_argument("--disable-blink-features=AutomationControlled")
         self.options.add_experimental_option("excludeSwitches", ["enable-automation"])
         self.options.add_experimental_option('useAutomationExtension', False)
         self.options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        enable_event_log(self.options)
         self.driver = None
+        self.network = None
 
     def start(self):
-        logging.info("Starting NSE Fetcher...")
+        if self.http:
+            logging.info("Starting NSE Fetcher (HTTP mode)...")
+            try:
+                self.http.warm_up()
+            except Exception as e:
+                # Not fatal: get_top_symbols re-warms and falls back to the browser if needed
+                logging.warning(f"NSE session warm-up failed: {e}")
+        else:
+            self._start_browser()
+
+    def _start_browser(self):
+        if self.shared_grid:
+            logging.info("Opening NSE Fetcher tab in the grid browser...")
+            self.driver = self.shared_grid.driver
+            self.handle = self.shared_grid.open_tab()
+            return
+        logging.info("Starting NSE Fetcher browser...")
         self.driver = webdriver.Chrome(options=self.options)
 
     def stop(self):
-        if self.driver:
+        if self.lists:
+            self.lists.close()
+        if self.http:
+            self.http.close()
+        if self.shared_grid:
+            if self.handle:
+                self.shared_grid.close_tab(self.handle)
+        elif self.driver:
             self.driver.quit()
 
     def get_top_symbols(self, limit=20):
+        """Grid candidates, best first: GRID_SLOTS for the grid, the rest for standby."""
+        self.tables = {}
+        symbols = self._fetch_top_symbols(limit)
+        if self.store and self.tables:
+            if self.shown:
+                self.tables["grid"] = [{"symbol": sym} for sym in self.shown]
+            try:
+                with metrics.span("snapshot_append"):
+                    self.store.append(self.tables)
+            except Exception as e:
+                logging.warning(f"Snapshot store append failed: {e}")
+        return symbols
+
+    def _persistence_bonus(self):
+        if not (self.store and PERSISTENCE_WEIGHT > 0):
+            return None
+        # Keyed on what the grid displayed: rank < GRID_SLOTS in some list says nothing about that
+        share = self.store.persistence(top=GRID_SLOTS, list_name="grid", window=PERSISTENCE_WINDOW)
+        return {sym: PERSISTENCE_WEIGHT * value for sym, value in share.items()}
+
+    def _fetch_top_symbols(self, limit):
+        with metrics.span("nse_fetch"):
+            if self.http:
+                try:
+                    if self.lists:
+                        with metrics.span("nse_fetch_lists"):
+                            symbols = self.lists.top_symbols(limit, bonus=self._persistence_bonus())
+                        self.tables = dict(self.lists.last)
+                        if symbols:
+                            return symbols
+                        logging.warning("No NSE list returned symbols, using the volume gainers page.")
+                    with metrics.span("nse_fetch_http"):
+                        return self._single_page(self._get_top_symbols_http(limit + 1))
+                except NSESessionRejected as e:
+                    logging.warning(f"{e}. Falling back to browser fetch.")
+            with metrics.span("nse_fetch_browser"):
+                return self._single_page(self._get_top_symbols_browser(limit + 1))
+
+    def _single_page(self, symbols):
+        # The single-page grid has always started at the page's second row
+        return symbols[1:] if len(symbols) > 1 else symbols
+
+    def _get_top_symbols_http(self, limit):
+        for attempt in range(3):
+            try:
+                data = self.http.get_json(NSE_API_PATH)
+                rows = [row for row in data.get("data", []) if row.get("symbol")]
+                symbols = [row["symbol"].strip() for row in rows][:limit]
+                if not symbols:
+                    raise Exception("No symbols in NSE API response")
+                self.tables = {"volume_spurts": rows}
+
+                logging.info(f"Successfully fetched {len(symbols)} symbols from NSE API.")
+                return symbols
+
+            except NSESessionRejected:
+                raise
+            except Exception as e:
+                logging.warning(f"Error fetching NSE API (Attempt {attempt+1}): {e}")
+
+        logging.error("Failed to fetch symbols from NSE API after 3 attempts.")
+        return []
+
+    def _get_top_symbols_browser(self, limit):
+        if not self.shared_grid:
+            return self._scrape_top_symbols(limit)
+        # Shared browser: hold the grid's driver while our tab is the WebDriver target
+        with self.shared_grid.driver_lock:
+            try:
+                # (Re)open our tab, also after the grid browser was restarted
+                if not self.handle or self.driver is not self.shared_grid.driver:
+                    self._start_browser()
+                self.driver.switch_to.window(self.handle)
+                return self._scrape_top_symbols(limit)
+            finally:
+                self.shared_grid.focus_grid()
+
+    def _network_tracker(self):
+        if self.shared_grid:
+            return self.shared_grid.network_tracker()
+        if self.network is None:
+            self.network = NetworkTracker(EventPump(self.driver))
+        return self.network
+
+    def _scrape_top_symbols(self, limit):
+        if not self.driver:
+            self._start_browser()
+
         # Retry loop for robustness
         for attempt in range(3):
             try:
                 if attempt > 0:
                     logging.info(f"Retrying NSE fetch (Attempt {attempt+1}/3)...")
                     self.driver.refresh()
-                    time.sleep(5) # Cooldown
+                    # Cooldown: until the page's own XHRs have settled, not a fixed 5s
+                    # In the shared browser only the NSE tab counts (its handle is its main frame id)
+                    wait_for(self.driver, network_idle(self._network_tracker(), 0.5, self.handle), 10, "nse_network_idle")
                 else:
                     self.driver.get(self.url)
                 
@@ -56,31 +433,19 @@ class NSEFetcher:
                     EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr"))
                 )
 
-                # Now scrape table
-                soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                table = None
-                
-                # Find table with "Symbol" or "SYMBOL"
-                for tbl in soup.find_all("table"):
-                    if tbl.find("th", string=lambda x: x and "SYMBOL" in x.upper()):
-                        table = tbl
-                        break
+                # Pull only the first column in-browser (one round-trip, no page_source re-parse)
+                try:
+                    symbols = self.driver.execute_script(EXTRACT_SYMBOLS_JS, limit)
+                except Exception as e:
+                    logging.warning(f"In-browser extraction failed ({e}), parsing page source instead.")
+                    symbols = parse_symbols_fast(self.driver.page_source, limit)
                 
-                if not table:
+                if symbols is None:
                     raise Exception("Table with SYMBOL header not found")
-                
-                symbols = []
-                rows = table.find_all("tr")[1:] 
-                for row in rows:
-                    cols = row.find_all("td")
-                    if cols and len(cols) > 0:
-                        symbol = cols[0].get_text(strip=True).split()[0].strip()
-                        symbols.append(symbol)
-                        if len(symbols) >= limit:
-                            break
                             
                 if not symbols: 
                      raise Exception("No symbols parsed from table")
+                self.tables = {"volume_spurts": [{"symbol": sym} for sym in symbols]}
                      
                 logging.info(f"Successfully fetched {len(symbols)} symbols from NSE.")
                 return symbols
@@ -95,337 +460,577 @@ class NSEFetcher:
 
 
 class DhanGrid:
-    def __init__(self):
+    # High-Performance Flags (Safe Subset)
+    # AutomationControlled is off so a shared NSE tab is not flagged as a bot
+    CHROME_FLAGS = [
+        "--start-maximized",
+        "--enable-gpu-rasterization",
+        "--ignore-gpu-blocklist",
+        "--disable-background-timer-throttling",
+        "--disable-blink-features=AutomationControlled",
+    ]
+
+    def __init__(self, chart_url=CHART_BASE_URL, profile_dir=PROFILE_DIR, headless=False, mode=BROWSER_MODE, debug_port=DEBUG_PORT, block_profile=BLOCK_PROFILE, layout=LAYOUT, state_file=grid_state.STATE_FILE):
+        self.chart_url = chart_url.rstrip("/")
+        self.layout = layout
+        self.state_file = state_file  # crash-recovery state (grid_state.py), None = not persisted
+        self.mode = mode
+        self.block_profile = block_profile
+        self.debug_port = debug_port
+        self.profile_dir = profile_dir
         self.options = Options()
-        self.options.add_argument("--start-maximized")
-        self.options.add_argument(f"user-data-dir={os.getcwd()}/user_data")
-        
-        # High-Performance Flags (Safe Subset)
-        self.options.add_argument("--enable-gpu-rasterization")
-        self.options.add_argument("--ignore-gpu-blocklist")
-        self.options.add_argument("--disable-background-timer-throttling")
+        if mode == "attach":
+            # Flags and profile belong to the detached Chrome we attach to
+            self.options.debugger_address = f"127.0.0.1:{debug_port}"
+        else:
+            if profile_dir:
+                self.options.add_argument(f"user-data-dir={profile_dir}")
+            if headless:
+                self.options.add_argument("--headless=new")
+                self.options.add_argument("--window-size=1920,1080")
+            for flag in self.CHROME_FLAGS:
+                self.options.add_argument(flag)
         
         self.options.set_capability('goog:loggingPrefs', {'browser': 'ALL'})
+        enable_event_log(self.options)
         self.driver = None
+        self.network = None
         self.is_initialized = False
+        self.grid_handles = []  # one per layout window, window 0 first
+        self.frame_scripts = {}  # window handle -> CDP id of its frame setup script
+        # One WebDriver session = one current window: anything that switches windows
+        # or frames (grid updates, shared NSE tab) must hold this lock.
+        self.driver_lock = threading.RLock()
+
+        # Frame ids are fixed by the layout, symbols move between them via the slot map
+        self.frame_pages = layout.frame_pages
+        self.slots = SlotAssigner(layout.frame_ids)
+        self.pending_reloads = {}  # frame id -> symbol it was reloaded with, until the chart reports it
+        self.memory = MemoryGovernor(self, MEMORY_BUDGET_MB)
+        self.standby = StandbyPool(self, STANDBY_POOL_SIZE)
+        self.health = HealthMonitor(self)
+        self.watchdog = DriverWatchdog(self)
 
     def start(self):
+        # Header stripper + request blocking, rebuilt so BLOCK_PROFILE changes apply on launch
+        ext_flags = extension_flags(build_extension(self.block_profile))
+        if self.mode == "attach":
+            # An already running browser keeps the extension it was launched with
+            ensure_debug_browser(self.debug_port, self.profile_dir or PROFILE_DIR, self.CHROME_FLAGS + ext_flags)
+        else:
+            for flag in ext_flags:
+                if flag not in self.options.arguments:
+                    self.options.add_argument(flag)
         logging.info("Starting Dhan Grid Browser...")
         self.driver = webdriver.Chrome(options=self.options)
-        self.driver.get("https://tv.dhan.co/")
+        self.watchdog.start()
+        self.open_session()
+
+    def open_session(self):
+        """Sets up a fresh WebDriver session: adopts the grid on screen (attach mode) or opens the chart site."""
+        # CDP registrations die with the previous WebDriver session: always re-install
+        self.frame_scripts = {}
+        if self.mode == "attach" and self.adopt_existing_grid():
+            return
+        # The current tab becomes the grid: register before anything loads in it
+        self.install_frame_scripts()
+        self.driver.get(self.chart_url + "/")
+        self.grid_handles = [self.driver.current_window_handle]
+        self.place_window(0)
         logging.info("Please log in to Dhan in the opened window.")
 
-    def init_grid(self, symbols):
-        logging.info("Initializing Grid Layout with PRIORITY LOADING...")
-        
-        style = """
-            body { margin: 0; overflow: hidden; background: #000; font-family: sans-serif; }
-            .tab-bar { position: absolute; top: 0; left: 0; width: 100%; height: 35px; background: #222; display: flex; z-index: 100000; border-bottom: 2px solid #444; }
-            .tab-btn { flex: 1; border: none; background: #333; color: #fff; cursor: pointer; border-right: 1px solid #444; font-size: 14px; text-transform: uppercase; letter-spacing: 1px; }
-            .tab-btn:hover { background: #444; }
-            .tab-btn.active { background: #007bff; font-weight: bold; color: white; }
-            .grid-page { display: none; width: 100vw; height: calc(100vh - 35px); margin-top: 35px; grid-template-columns: repeat(3, 1fr); grid-template-rows: repeat(2, 1fr); gap: 2px; background: #111; }
-            .grid-page.active-page { display: grid; }
-            iframe { width: 100%; height: 100%; border: none; background: #000; }
+    @property
+    def grid_handle(self):
+        return self.grid_handles[0] if self.grid_handles else None
+
+    def adopt_existing_grid(self):
         """
-        
-        scripts = """
-        // Helper to load a tab's iframes with STAGGERED delay
-        window.loadTab = function(index) {
-            let container = document.getElementById('tab-' + index);
-            if(!container) return;
-            let frames = container.querySelectorAll('iframe');
-            frames.forEach((iframe, i) => {
-                let pending = iframe.getAttribute('data-pending-src');
-                if(pending) {
-                    // Stagger load by 300ms per frame to prevent CPU choke
-                    setTimeout(() => {
-                        iframe.src = pending;
-                        iframe.removeAttribute('data-pending-src');
-                    }, i * 300);
-                }
-            });
-        };
+        Attach mode: reuse a grid left on screen by a previous run instead of rebuilding it.
+        Windows built with another layout are patched in place, missing windows are added.
+        """
+        found = {}
+        for handle in self.driver.window_handles:
+            self.driver.switch_to.window(handle)
+            try:
+                grid = self.driver.execute_script(ADOPT_GRID_JS)
+            except Exception:
+                continue
+            if grid is not None:
+                found.setdefault(grid["window"], (handle, grid))
+        if 0 not in found:
+            return False
 
-        window.showTab = function(index) {
-            document.querySelectorAll('.grid-page').forEach(el => el.classList.remove('active-page'));
-            document.querySelectorAll('.tab-btn').forEach(el => el.classList.remove('active'));
-            document.getElementById('tab-' + index).classList.add('active-page');
-            document.getElementById('btn-' + index).classList.add('active');
-            
-            // On-Demand Load (Staggered)
-            window.loadTab(index);
-        };
+        self.grid_handles = []
+        shown = {}
+        for window in range(len(self.layout.windows)):
+            if window not in found:
+                break
+            handle, grid = found[window]
+            self.grid_handles.append(handle)
+            shown.update(grid["symbols"])
+        self.slots.restore(shown)
+        self.is_initialized = True
+        for window, handle in enumerate(self.grid_handles):
+            # Register on the grid window itself, not on whichever tab the session started in
+            self.driver.switch_to.window(handle)
+            self.install_frame_scripts()
+            reloaded = self.driver.execute_script(RELOAD_UNPREPARED_JS)
+            if reloaded:
+                logging.info(f"Reloaded {reloaded} adopted charts that were missing the frame setup script.")
+        self.focus_grid()
+        for window in range(len(self.grid_handles)):
+            if found[window][1]["layout"] != self.layout.signature():
+                self.patch_window(window)
+                logging.info(f"Grid window {window + 1} patched from layout {found[window][1]['layout']} to {self.layout.signature()}.")
+        for window in range(len(self.grid_handles), len(self.layout.windows)):
+            self.write_window(window)
+        self.focus_grid()
+        logging.info(f"Adopted running grid ({len(self.slots.shown)} charts), no reload or login needed.")
+        return True
 
-        // Smart Update: Handles both loaded and pending frames
-        window.updateChart = function(id, symbol) {
-            let el = document.getElementById(id);
-            if(el) {
-                let newSrc = "https://tv.dhan.co/?symbol=NSE:" + symbol;
-                
-                if (el.hasAttribute('data-pending-src')) {
-                    el.setAttribute('data-pending-src', newSrc);
-                    el.setAttribute('data-symbol', symbol);
-                } 
-                else if(el.getAttribute('data-symbol') !== symbol) {
-                    el.src = newSrc;
-                    el.setAttribute('data-symbol', symbol);
-                }
-            }
-        };
-        
-        // Trigger load for hidden pages only (Page 1 is already loaded)
-        window.loadTab(0); // Ensures any pending frames on Page 1 are caught, though there shouldn't be any
-        """
-        
-        html_content = '<div id="custom-ui" style="position:absolute; top:0; left:0; width:100%; height:100%; z-index:99999; background:#000;">'
-        html_content += f'<style>{style}</style>'
-        html_content += '<link rel="preconnect" href="https://tv.dhan.co">'
-        html_content += f'<script>{scripts}</script>'
-        
-        # Tabs
-        html_content += '<div class="tab-bar">'
-        for i in range(4):
-            active = "active" if i == 0 else ""
-            html_content += f'<button id="btn-{i}" class="tab-btn {active}" onclick="showTab({i})">PAGE {i+1}</button>'
-        html_content += '</div>'
-        
-        # Structure for 4 pages x 6 charts
-        chunks = [symbols[i:i + 6] for i in range(0, len(symbols), 6)]
-        while len(chunks) < 4: chunks.append([])
-
-        for i in range(4):
-            active_page = "active-page" if i == 0 else ""
-            html_content += f'<div id="tab-{i}" class="grid-page {active_page}">'
-            chunk = chunks[i]
-            for slot_idx in range(6):
-                fid = f"chart-frame-{i}-{slot_idx}"
-                if slot_idx < len(chunk):
-                    # Use generic NIFTY URL to guarantee Toolbar/Search Button loads
-                    src = "https://tv.dhan.co/?symbol=NSE:NIFTY" 
-                    
-                    if i == 0:
-                        # Page 1: Direct Injection (0ms Latency - Critical Path)
-                        html_content += f'<iframe id="{fid}" src="{src}" allow="autoplay; encrypted-media"></iframe>'
-                    else:
-                        # Page 2-4: DEFER (Pending/Staggered)
-                        html_content += f'<iframe id="{fid}" src="about:blank" data-pending-src="{src}" allow="autoplay; encrypted-media"></iframe>'
+    def restore_state(self):
+        """Rebuilds the grid saved after the last update (see grid_state.py) in one init_grid."""
+        if not self.state_file:
+            return False
+        state = grid_state.load_state(self.chart_url, self.state_file)
+        if not state:
+            return False
+        self.slots.restore(state["shown"])
+        ranking = state.get("ranking", [])
+        with self.driver_lock:
+            self.focus_grid()
+            with metrics.span("init_grid", restored=True):
+                self.init_grid(ranking)
+            wait_for(self.driver, js(GRID_READY_JS), 5, "grid_ready")
+            self.standby.refill(ranking, set(self.slots.assigned))
+        logging.info(f"Restored saved grid ({len(self.slots.shown)} charts) without retyping.")
+        return True
+
+    def save_state(self, ranking):
+        if not self.state_file:
+            return
+        try:
+            grid_state.save_state(dict(self.slots.shown), ranking, self.chart_url, self.state_file)
+        except Exception as e:
+            logging.warning(f"Failed to save grid state: {e}")
+
+    def restart(self):
+        """Replaces a dead browser/driver session and brings the previous grid back."""
+        with self.driver_lock:
+            logging.warning("Restarting the grid browser...")
+            try:
+                if self.mode == "attach":
+                    self.driver.service.stop()
                 else:
-                    html_content += f'<iframe id="{fid}" src="about:blank" allow="autoplay; encrypted-media"></iframe>'
-            html_content += '</div>'
-        html_content += '</div>'
-        
-        # NUCLEAR OPTION: Use document.write() to completely replace the page content.
-        # This prevents any React/SPA re-hydration from overwriting our grid.
-        js_cmd = f"document.open(); document.write(`{html_content}`); document.close();"
-        self.driver.execute_script(js_cmd)
-        
-        # We don't need to re-inject 'scripts' because document.write executes <script> tags inline.
-        self.is_initialized = True
-        logging.info("Grid Initialized (Staggered Loading Active).")
+                    self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+            self.is_initialized = False
+            self.grid_handles = []
+            self.network = None
+            self.slots = SlotAssigner(self.layout.frame_ids)
+            self.pending_reloads = {}
+            self.standby.shown = {}
+            self.start()
+            if not self.is_initialized:
+                self.restore_state()
+
+    def network_tracker(self):
+        if self.network is None or self.network.pump.driver is not self.driver:
+            self.network = NetworkTracker(EventPump(self.driver))
+        return self.network
+
+    def open_tab(self):
+        """Opens a background tab in this browser for another worker. Returns its window handle."""
+        with self.driver_lock:
+            self.driver.switch_to.new_window("tab")
+            handle = self.driver.current_window_handle
+            self.focus_grid()
+            return handle
+
+    def close_tab(self, handle):
+        with self.driver_lock:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+            self.focus_grid()
+
+    def focus_grid(self):
+        if self.grid_handle:
+            self.driver.switch_to.window(self.grid_handle)
+
+    def focus_window(self, window):
+        """
+        Switches to grid window `window`, opening it first when it does not exist yet.
+        A single-window grid is already focused by whoever holds the lock (focus_grid).
+        """
+        if window and window >= len(self.grid_handles):
+            self.driver.switch_to.new_window("window")
+            self.grid_handles.append(self.driver.current_window_handle)
+            self.place_window(window)
+            # Before the first chart frame exists, like the first window
+            self.install_frame_scripts()
+            # Same origin as the chart frames, like the first window
+            self.driver.get(self.chart_url + "/")
+        elif len(self.grid_handles) > 1:
+            self.driver.switch_to.window(self.grid_handles[window])
+
+    def place_window(self, window):
+        rect = self.layout.windows[window]
+        if not rect:
+            return
+        try:
+            self.driver.set_window_rect(*rect)
+        except Exception as e:
+            logging.warning(f"Could not place grid window {window + 1} at {rect}: {e}")
+
+    def by_window(self, updates):
+        """Groups [(frame_id, symbol)] by the grid window holding the frame, in window order."""
+        groups = {}
+        for fid, sym in updates:
+            groups.setdefault(self.layout.frame_window[fid], []).append((fid, sym))
+        return sorted(groups.items())
+
+    def cdp_frame_id(self, fid):
+        """DevTools frame id of chart iframe `fid` in the focused grid window, or None."""
+        try:
+            root = self.driver.execute_cdp_cmd("DOM.getDocument", {"depth": 0})["root"]["nodeId"]
+            node = self.driver.execute_cdp_cmd("DOM.querySelector", {"nodeId": root, "selector": f"#{fid}"})["nodeId"]
+            return self.driver.execute_cdp_cmd("DOM.describeNode", {"nodeId": node})["node"].get("frameId")
+        except Exception:
+            return None
 
+    def install_frame_scripts(self):
+        """
+        Registers the chart-frame setup (toolbar hiding CSS + hotkey guard) ONCE via CDP
+        on the current window. Chrome then runs it in every chart frame of that window before
+        the frame's own scripts, including frames created or reloaded later, so nothing is
+        re-injected per cycle. The registration is per target: every grid window needs its own.
+        """
+        handle = self.driver.current_window_handle
+        if handle in self.frame_scripts:
+            return
+        with metrics.span("install_frame_scripts"):
+            source = FRAME_SETUP_JS.replace("__CHART_HOST__", urlparse(self.chart_url).netloc)
+            result = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+        self.frame_scripts[handle] = (result or {}).get("identifier")
+        logging.info("Frame setup script installed (CSS hide rules + hotkey guard).")
+
+    def init_grid(self, symbols):
+        logging.info(f"Initializing Grid Layout with PRIORITY LOADING ({self.layout})...")
+        for window in range(len(self.layout.windows)):
+            self.write_window(window)
+        self.focus_grid()
         self.is_initialized = True
         logging.info("Grid Initialized (Staggered Loading Active).")
 
-    def cleanup_ui(self):
+    def write_window(self, window):
+        """Writes the whole grid document of `window`. Frames with a known symbol load it directly."""
+        self.focus_window(window)
+        # The standby pool lives in the first window (swaps only work within one document)
+        html_content = self.layout.render_window(
+            window,
+            self.chart_url,
+            dict(self.slots.shown),
+            extra_style=POOL_STYLE if window == 0 else "",
+            extra_html=self.standby.html() if window == 0 else "",
+        )
+        # NUCLEAR OPTION: Use document.write() to completely replace the page content.
+        # This prevents any React/SPA re-hydration from overwriting our grid.
+        # document.write executes the <script> tags inline, nothing else needs injecting.
+        self.driver.execute_script(WRITE_GRID_JS, html_content)
+
+    def patch_window(self, window):
+        """Brings a live grid window to the current layout, touching only pages/frames that differ."""
+        self.focus_window(window)
+        spec = self.layout.patch_spec(window, self.chart_url, dict(self.slots.shown))
+        with metrics.span("layout_patch", window=window):
+            return self.driver.execute_script(LAYOUT_PATCH_JS, spec)
+
+    def active_page(self):
+        try:
+            return self.driver.execute_script(ACTIVE_PAGE_JS)
+        except Exception:
+            return None
+
+    def set_symbols_api(self, updates):
+        """
+        Switches frames via the in-frame chart API. `updates` is [(frame_id, symbol)].
+        Returns {frame_id: {"symbol": symbol read back from the chart or None, "ms": elapsed}}.
         """
-        Injects CSS into each chart frame to hide the Top Toolbar (Header),
-        giving a clean 'Chart-Only' view and removing 'Sell/Buy' buttons.
+        if not updates:
+            return {}
+        rounds = -(-len(updates) // UPDATE_CONCURRENCY)
+        try:
+            self.driver.set_script_timeout(SYMBOL_API_TIMEOUT * rounds + 5)
+            with metrics.span("chart_api_batch", frames=len(updates)):
+                return self.driver.execute_async_script(
+                    SET_SYMBOLS_JS, [list(u) for u in updates], SYMBOL_API_TIMEOUT * 1000, UPDATE_CONCURRENCY
+                ) or {}
+        except Exception as e:
+            logging.warning(f"Chart API symbol change failed: {e}")
+            return {}
+
+    def update_charts(self, symbols, abort=None, standby=()):
         """
-        logging.info("Cleaning up UI (Hiding Toolbars)...")
-        # CSS to hide Top Header, Left Toolbar, and maximize chart area
-        css_hide = """
-            .layout__area--top, 
-            .header-chart-panel, 
-            .tv-header,
-            .chart-toolbar,
-            [data-role='toolbar'],
-            .drawing-toolbar,
-            .layout__area--left { 
-                display: none !important; 
-            }
+        Pushes the ranked `symbols` to the grid. `standby` are the next-ranked symbols
+        to keep pre-loaded in the hidden standby pool.
         """
+        with self.driver_lock:
+            self.focus_grid()
+            result = self._update_charts(symbols, abort)
+            self.standby.refill(standby, set(self.slots.assigned))
+            self.save_state(list(symbols) + list(standby))
+            return result
+
+    def _update_charts(self, symbols, abort=None):
+        logging.info(f"Updating dashboard with {len(symbols)} symbols...")
         
-        # We need to switch to each frame to inject this
-        # We process Page 1 (Visible) immediately. Pages 2-4 can happen in background?
-        # Actually, Selenium can switch to hidden frames too.
+        if not self.is_initialized:
+            with metrics.span("init_grid"):
+                self.init_grid(symbols)
+            # Frames themselves are awaited per chart (API: onChartReady, typing: canvas marker)
+            wait_for(self.driver, js(GRID_READY_JS), 5, "grid_ready")
         
-        for i in range(4):
-            for slot_idx in range(6):
-                fid = f"chart-frame-{i}-{slot_idx}"
-                try:
-                    frame = self.driver.find_element(By.ID, fid)
-                    self.driver.switch_to.frame(frame)
-                    
-                    # Inject Style
-                    js = f"var s=document.createElement('style'); s.innerHTML=`{css_hide}`; document.head.appendChild(s);"
-                    self.driver.execute_script(js)
-                    
-                    self.driver.switch_to.default_content()
-                except Exception:
-                    # Frame might be loading or failed, skip silently
-                    self.driver.switch_to.default_content()
-                    pass
-        logging.info("UI Cleanup Complete.")
-
-    def update_charts(self, symbols):
-        logging.info(f"Updating dashboard with {len(symbols)} symbols via SEARCH & TYPE...")
+        self.confirm_reloads()
+        # Only frames whose symbol left the list get retyped; symbols that stay keep their frame
+        plan = self.slots.plan(symbols)
+        logging.info(f"Slot plan: {len(plan.updates)} to update, {plan.skipped} unchanged, {len(plan.vacated)} vacated.")
         
-        if not self.is_initialized:
-            self.init_grid(symbols)
-            # Give frames a moment to load - Reduced to 0.5s for MAX speed
-            logging.info("Waiting 0.5s for Grid to stabilize...")
-            time.sleep(0.5) 
+        # FASTEST: symbols already warm in the standby pool are swapped in (no reload)
+        updated = 0
+        with metrics.span("standby_swap"):
+            swapped = self.standby.promote([u for u in plan.updates if self.layout.frame_window[u[0]] == 0])
+        for fid, sym in swapped:
+            self.slots.confirm(fid, sym)
+            updated += 1
+        pending = [u for u in plan.updates if u not in swapped]
         
-        # We need to iterate through frames and type the symbol
-        # Map symbols to frames same as init
-        chunks = [symbols[i:i + 6] for i in range(0, len(symbols), 6)]
-        while len(chunks) < 4: chunks.append([])
+        # PRIMARY STRATEGY: chart API (confirmed by reading the active symbol back)
+        fallback = []
+        results = {}
+        for window, group in self.by_window(pending):
+            self.focus_window(window)
+            results.update(self.set_symbols_api(group))
+        for fid, sym in pending:
+            result = results.get(fid) or {}
+            active = result.get("symbol")
+            if "ms" in result:
+                metrics.record("frame_update", result["ms"], frame=fid, method="api", ok=bool(active))
+            if active and active.split(":")[-1].upper() == sym.upper():
+                self.slots.confirm(fid, sym)
+                updated += 1
+                logging.info(f"Updated {fid} -> {sym} (chart API)")
+            else:
+                fallback.append((fid, sym))
         
-        for i in range(4): # For each page
-            chunk = chunks[i]
-            if len(chunk) == 0: continue
-            
-            # Switch Tabs for visibility (Required for Selenium interaction)
+        if fallback:
+            logging.info(f"{len(fallback)} frames did not confirm via chart API, falling back...")
+        
+        # The page the user is looking at (in each window) never changes. Frames on it are retyped
+        # in place; frames on hidden pages can't take keystrokes, so they reload with the symbol in the URL.
+        active_pages = {}
+        for window, _ in self.by_window(fallback):
+            self.focus_window(window)
+            active_pages[window] = self.active_page()
+        typing = [u for u in fallback if self.frame_pages[u[0]] == active_pages[self.layout.frame_window[u[0]]]]
+        reloads = [u for u in fallback if u not in typing]
+        for window, group in self.by_window(reloads):
             try:
-                logging.info(f"Switching to PAGE {i+1}...")
-                tab_btn = self.driver.find_element(By.ID, f"btn-{i}")
-                tab_btn.click()
-                tab_btn.click()
-                time.sleep(0.5) # Fast transition wait
+                self.focus_window(window)
+                with metrics.span("frame_reload", frames=len(group)):
+                    self.driver.execute_script(RELOAD_CHARTS_JS, [list(u) for u in group])
+                for fid, sym in group:
+                    # Unconfirmed until the chart reports it (next cycle or health probe)
+                    self.pending_reloads[fid] = sym
+                    logging.info(f"Reloaded {fid} -> {sym} (hidden page {self.frame_pages[fid] + 1}, pending)")
             except Exception as e:
-                logging.error(f"Failed to switch to Page {i+1}: {e}")
-                continue
+                logging.error(f"Failed to reload hidden frames: {e}")
+        
+        typed = {}
+        for fid, raw_symbol in typing:
+            if abort and abort():
+                logging.info("Fresher ranking available, abandoning this update.")
+                break
 
-            for slot_idx in range(6):
-                if slot_idx >= len(chunk): break
-                
-                raw_symbol = chunk[slot_idx]
-                # LOWERCASE CONVERSION (User Request: Prevent Shift+Keys)
-                symbol = raw_symbol.lower() # 'SBIN' -> 'sbin'
-                
-                fid = f"chart-frame-{i}-{slot_idx}"
+            # LOWERCASE CONVERSION (User Request: Prevent Shift+Keys)
+            symbol = raw_symbol.lower() # 'SBIN' -> 'sbin'
+            started = time.perf_counter()
+            
+            try:
+                # switch to frame
+                self.focus_window(self.layout.frame_window[fid])
+                cdp_frame = self.cdp_frame_id(fid)
+                frame = self.driver.find_element(By.ID, fid)
+                self.driver.switch_to.frame(frame)
                 
+                # -------------------------------------------------------------
+                # FALLBACK STRATEGY: TYPE-TO-SEARCH (NATIVE)
+                # -------------------------------------------------------------
+                # Only used for frames the chart API could not switch
+                # (widget not exposed yet, frame still loading, etc).
                 try:
-                    # switch to frame
-                    frame = self.driver.find_element(By.ID, fid)
-                    self.driver.switch_to.frame(frame)
-                    
-                    # 1. HOTKEY KILLER INJECTION
-                    hk_killer = """
-                        window.addEventListener('keydown', function(e) {
-                            // Allow typing in INPUT fields
-                            if(e.target.tagName === 'INPUT') return;
-                            
-                            // Block Dangerous Instant Orders: Shift + S (Sell), Shift + B (Buy)
-                            // We allow plain 's' and 'b' so the user can Type-to-Search (e.g. 'SBIN')
-                            var key = e.key.toLowerCase();
-                            if(e.shiftKey && (key === 's' || key === 'b')) {
-                                e.stopImmediatePropagation();
-                                e.preventDefault();
-                                console.log('Blocked dangerous key: Shift + ' + key);
-                            }
-                            // Block Fullscreen 'f'
-                            if(key === 'f') {
-                                e.stopImmediatePropagation();
-                                e.preventDefault();
-                            }
-                        }, true);
-                    """
-                    self.driver.execute_script(hk_killer)
+                    # 1. Focus Canvas (ensure keystrokes register)
+                    wait_for(self.driver, js(CANVAS_READY_JS), 10, "canvas_ready", frame=fid)
+                    canvases = self.driver.find_elements(By.TAG_NAME, "canvas")
+                    if canvases:
+                        canvases[0].click()
+                    else:
+                        self.driver.find_element(By.TAG_NAME, "body").click()
+                    wait_for(self.driver, js(FRAME_FOCUSED_JS), 2, "frame_focus", frame=fid)
+
+                    # 2. Type, wait for the search box to hold it and its lookup to finish, then Enter
+                    ActionChains(self.driver).send_keys(symbol).perform()
+                    wait_for(self.driver, js(SEARCH_TYPED_JS, symbol), 2, "search_typed", frame=fid)
+                    wait_for(self.driver, network_idle(self.network_tracker(), 0.15, cdp_frame), 3, "search_network_idle", frame=fid)
+                    ActionChains(self.driver).send_keys(Keys.ENTER).perform()
                     
-                    # -------------------------------------------------------------
-                    # PRIMARY STRATEGY: TYPE-TO-SEARCH (NATIVE)
-                    # -------------------------------------------------------------
-                    # As requested, this is now the FIRST and ONLY priority.
-                    # It bypasses UI detection issues and is the fastest method.
-                    try:
-                        # 1. Focus Canvas (ensure keystrokes register)
-                        canvases = self.driver.find_elements(By.TAG_NAME, "canvas")
-                        if canvases:
-                            canvases[0].click()
-                        else:
-                            self.driver.find_element(By.TAG_NAME, "body").click()
-                        time.sleep(0.5)
-
-                        # 2. Type AND Enter in one continuous chain
-                        # Sequence: Type Symbol -> Wait 0.35s -> Arrow Down -> Enter
-                        actions = ActionChains(self.driver)
-                        actions.send_keys(symbol)
-                        actions.pause(0.35) # Validated minimum wait for network
-                        actions.send_keys(Keys.ENTER)
-                        actions.perform()
-                        
-                        # 3. Success (No validation wait needed, assume success)
+                    # 3. Confirm via the chart's symbol marker when it has one
+                    loaded = wait_for(self.driver, js(SYMBOL_LOADED_JS, symbol), 5, "symbol_loaded", frame=fid)
+                    if not loaded:
+                        raise Exception("chart did not switch to the typed symbol")
+                    elapsed = (time.perf_counter() - started) * 1000
+                    if loaded == "unknown":
+                        # No marker to read the symbol back: left unconfirmed, so the next cycle retries it
+                        metrics.record("frame_update", elapsed, frame=fid, method="keys", ok=None)
+                        logging.warning(f"Typed {symbol} into {fid} but the chart can't confirm it.")
+                    else:
+                        self.slots.confirm(fid, raw_symbol)
+                        typed[fid] = raw_symbol
+                        updated += 1
+                        metrics.record("frame_update", elapsed, frame=fid, method="keys", ok=True)
                         logging.info(f"Updated {fid} -> {symbol}")
-                        
-                    except Exception as e:
-                        logging.error(f"Failed update {fid}: {e}")
-
+                    
                 except Exception as e:
-                    logging.error(f"Frame access error {fid}: {e}")
-                finally:
-                    self.driver.switch_to.default_content()
+                    logging.error(f"Failed update {fid}: {e}")
+
+            except Exception as e:
+                logging.error(f"Frame access error {fid}: {e}")
+            finally:
+                self.driver.switch_to.default_content()
+        
+        # Keep data-symbol truthful so re-attach/unload restore the right chart
+        for window, group in self.by_window(typed.items()):
+            try:
+                self.focus_window(window)
+                self.driver.execute_script(SYNC_SYMBOLS_JS, dict(group))
+            except Exception as e:
+                logging.warning(f"Failed to record typed symbols on frames: {e}")
         
-        # Cleanup UI AFTER all typing is done
-        self.cleanup_ui()
-        logging.info("Finished Search & Type updates.")
+        logging.info(f"Finished updates: {updated} frames updated, {plan.skipped} skipped.")
+        self.enforce_memory_budget()
+        return updated, plan.skipped
+
+    def confirm_reload(self, fid, active):
+        """Confirms a pending reload of `fid` when the chart reports `active` (e.g. 'NSE:SBIN') for it."""
+        symbol = self.pending_reloads.get(fid)
+        if symbol and active and active.split(":")[-1].upper() == symbol.upper():
+            self.slots.confirm(fid, self.pending_reloads.pop(fid))
+            return True
+        return False
 
+    def confirm_reloads(self):
+        """Reads back the charts reloaded by earlier cycles; those showing their symbol are confirmed."""
+        self.pending_reloads = {fid: sym for fid, sym in self.pending_reloads.items() if self.slots.shown.get(fid) != sym}
+        confirmed = 0
+        for window, group in self.by_window(list(self.pending_reloads.items())):
+            try:
+                self.focus_window(window)
+                active = self.driver.execute_script(READ_SYMBOLS_JS, [fid for fid, _ in group]) or {}
+            except Exception as e:
+                logging.warning(f"Failed to read back reloaded charts: {e}")
+                continue
+            confirmed += sum(self.confirm_reload(fid, active.get(fid)) for fid, _ in group)
+        self.focus_window(0)
+        if confirmed:
+            logging.info(f"Confirmed {confirmed} charts reloaded last cycle, {len(self.pending_reloads)} still pending.")
 
-    def check_console(self):
-        if not self.driver: return
+    def enforce_memory_budget(self):
+        """Runs the memory governor in every grid window (each has its own renderer), then refocuses window 0."""
         try:
-            logs = self.driver.get_log('browser')
-            for entry in logs:
-                msg = entry['message']
-                if "SEVERE" in str(entry['level']):
-                    logging.info(f"JS CONSOLE: {msg}")
-        except Exception:
-            pass
+            for window in range(len(self.grid_handles)):
+                self.focus_window(window)
+                self.memory.enforce()
+        except Exception as e:
+            logging.warning(f"Memory governor failed: {e}")
+        finally:
+            self.focus_window(0)
+
 
     def close(self):
-        if self.driver:
+        self.health.stop()
+        self.watchdog.stop()
+        if not self.driver:
+            return
+        if self.mode == "attach":
+            # Leave the detached browser (and the grid on screen) running for the next start
+            self.driver.service.stop()
+        else:
             self.driver.quit()
 
 def main():
-    fetcher = NSEFetcher()
     grid = DhanGrid()
+    # Symbols are checked against Dhan's instrument master before they reach a frame
+    instruments = InstrumentMaster()
+    instruments.load()
+    store = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+    fetcher = NSEFetcher(shared_grid=grid if SHARE_BROWSER else None, store=store)
     
     try:
-        fetcher.start()
         grid.start()
+        fetcher.start()
         
-        print("")
-        print(">>> ------------------------------------------------ <<<")
-        print(">>> PLEASE LOG IN TO DHAN IN THE NEW CHROME WINDOW <<<")
-        print(">>> ------------------------------------------------ <<<")
-        print("")
-        input("Press Enter here AFTER you are fully logged in and see the chart...")
+        # Bring back the grid of the previous run (crash, restart) without retyping
+        if not grid.is_initialized:
+            grid.restore_state()
         
+        if not grid.is_initialized:
+            print("")
+            print(">>> ------------------------------------------------ <<<")
+            print(">>> PLEASE LOG IN TO DHAN IN THE NEW CHROME WINDOW <<<")
+            print(">>> ------------------------------------------------ <<<")
+            print("")
+            input("Press Enter here AFTER you are fully logged in and see the chart...")
+        
+        def fetch():
+            symbols = fetcher.get_top_symbols(limit=GRID_SLOTS + STANDBY_POOL_SIZE)
+            instruments.refresh_if_stale()
+            with metrics.span("resolve_symbols"):
+                return instruments.resolve_all(symbols)
+
+        def render(symbols, abort):
+            standby = symbols[GRID_SLOTS:]
+            symbols = symbols[:GRID_SLOTS]
+            # A dead browser also abandons the update: no point failing 24 frames one by one
+            stop = lambda: abort() or not grid.watchdog.alive()
+            with metrics.span("update_charts"):
+                grid.update_charts(symbols, abort=stop, standby=standby)
+            fetcher.shown = list(grid.slots.shown.values())
+
+        if HEALTH_MONITOR:
+            grid.health.start()
+
+        calendar = MarketCalendar() if MARKET_HOURS_ONLY else AlwaysOpen()
+        # The watchdog answers without touching WebDriver, so it is checked even mid-update
+        scheduler = RefreshScheduler(fetch, render, grid.watchdog.alive, REFRESH_INTERVAL, calendar)
+        restarts = []
         while True:
-            # Fetch 30
-            symbols = fetcher.get_top_symbols(limit=30)
-            
-            if symbols:
-                if len(symbols) > 1:
-                    symbols = symbols[1:25]
-                grid.update_charts(symbols)
-            else:
-                logging.warning("No symbols fetched.")
-                
-            logging.info(f"Sleeping for {REFRESH_INTERVAL} seconds...")
-            # Sleep loop
-            for _ in range(30):
-                time.sleep(1)
-                # verify browser is still open
-                try:
-                    grid.driver.title
-                except:
-                    logging.error("Browser closed.")
-                    return
-            
-            time.sleep(REFRESH_INTERVAL - 30)
+            try:
+                asyncio.run(scheduler.run())
+                break
+            except BrowserClosed:
+                restarts = [t for t in restarts if time.monotonic() - t < 3600]
+                if not AUTO_RESTART or len(restarts) >= MAX_RESTARTS:
+                    raise
+                restarts.append(time.monotonic())
+                logging.warning(f"Browser lost ({grid.watchdog.reason}) Restart {len(restarts)}/{MAX_RESTARTS} this hour...")
+                grid.restart()
             
+    except BrowserClosed:
+        logging.error("Browser closed.")
     except KeyboardInterrupt:
         logging.info("Stopping...")
     except Exception as e:
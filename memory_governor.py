@@ -0,0 +1,90 @@
+"""
+Memory budget for the chart grid.
+
+Once a page has been shown its chart iframes stay resident (and keep
+rendering, because background throttling is disabled). When renderer memory
+goes over the budget, the least-recently-viewed hidden pages are put back into
+the deferred state: their frames go to about:blank with data-pending-src
+pointing at the symbol they were showing, so showTab() restores them straight
+to the right chart with no retyping.
+"""
+import time
+import logging
+
+import metrics
+
+# Returns {active: index, viewedAt: {index: ms}, loaded: [indices of pages with live frames]}
+GRID_STATE_JS = """
+var state = {active: null, viewedAt: window.tabViewedAt || {}, loaded: []};
+document.querySelectorAll('.grid-page').forEach(function(page) {
+    var index = parseInt(page.id.split('-')[1], 10);
+    if (page.classList.contains('active-page')) state.active = index;
+    var live = Array.prototype.some.call(page.querySelectorAll('iframe'), function(f) {
+        return !f.hasAttribute('data-pending-src') && f.getAttribute('src') !== 'about:blank';
+    });
+    if (live) state.loaded.push(index);
+});
+return state;
+"""
+
+# arguments: page index, {frame id: symbol}. Returns number of frames unloaded.
+UNLOAD_TAB_JS = """
+var index = arguments[0], symbols = arguments[1], count = 0;
+var page = document.getElementById('tab-' + index);
+if (!page || page.classList.contains('active-page')) return 0;
+page.querySelectorAll('iframe').forEach(function(f) {
+    if (f.hasAttribute('data-pending-src') || f.getAttribute('src') === 'about:blank') return;
+    var symbol = symbols[f.id] || f.getAttribute('data-symbol') || 'NIFTY';
+    f.setAttribute('data-symbol', symbol);
+    f.setAttribute('data-pending-src', window.CHART_URL + '/?symbol=NSE:' + encodeURIComponent(symbol));
+    f.src = 'about:blank';
+    count++;
+});
+return count;
+"""
+
+
+class MemoryGovernor:
+    def __init__(self, grid, budget_mb):
+        self.grid = grid
+        self.budget_mb = budget_mb
+        self.enabled_cdp = set()  # window handles with the Performance domain on (CDP is per target)
+
+    def sample_mb(self, collect=False):
+        """JS heap in use by the focused grid window's renderer (chart iframes are same-origin, same isolate)."""
+        driver = self.grid.driver
+        handle = driver.current_window_handle
+        if handle not in self.enabled_cdp:
+            driver.execute_cdp_cmd("Performance.enable", {})
+            self.enabled_cdp.add(handle)
+        if collect:
+            # Unloaded frames are only reclaimed after GC: collect so the re-sample is honest
+            driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+        values = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+        return values.get("JSHeapUsedSize", 0) / (1024 * 1024)
+
+    def enforce(self):
+        """Unload LRU hidden pages until under budget. Returns the list of unloaded page indices."""
+        if not self.budget_mb:
+            return []
+        started = time.perf_counter()
+        used = self.sample_mb()
+        unloaded = []
+        if used > self.budget_mb:
+            state = self.grid.driver.execute_script(GRID_STATE_JS)
+            viewed_at = {int(k): v for k, v in (state.get("viewedAt") or {}).items()}
+            candidates = sorted(
+                (i for i in state["loaded"] if i != state["active"]),
+                key=lambda i: viewed_at.get(i, 0),
+            )
+            for index in candidates:
+                count = self.grid.driver.execute_script(UNLOAD_TAB_JS, index, dict(self.grid.slots.shown))
+                unloaded.append(index)
+                logging.info(f"Memory {used:.0f} MB > budget {self.budget_mb} MB: unloaded PAGE {index+1} ({count} frames).")
+                used = self.sample_mb(collect=True)
+                if used <= self.budget_mb:
+                    break
+            if used > self.budget_mb:
+                logging.warning(f"Memory still {used:.0f} MB after unloading all hidden pages (budget {self.budget_mb} MB).")
+        metrics.record("memory_governor", (time.perf_counter() - started) * 1000, heap_mb=round(used, 1), unloaded=len(unloaded))
+        return unloaded
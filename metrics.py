@@ -0,0 +1,111 @@
+"""
+Lightweight per-phase latency instrumentation.
+
+Spans are collected in memory during a refresh cycle and written as ONE JSON
+line per cycle to METRICS_FILE when the cycle ends:
+
+    {"cycle": 3, "ts": 1760000000.0, "spans": [{"phase": "nse_fetch", "ms": 412.7}, ...]}
+
+Summary report across a run:
+    python metrics.py [metrics.jsonl]
+"""
+import os
+import sys
+import json
+import math
+import time
+import threading
+import argparse
+from contextlib import contextmanager
+
+METRICS_FILE = os.environ.get("METRICS_FILE", "metrics.jsonl")
+
+
+class MetricsRecorder:
+    def __init__(self, path=METRICS_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.spans = []
+        self.cycle = 0
+
+    def record(self, phase, ms, **tags):
+        entry = {"phase": phase, "ms": round(ms, 2)}
+        entry.update(tags)
+        with self.lock:
+            self.spans.append(entry)
+
+    @contextmanager
+    def span(self, phase, **tags):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, (time.perf_counter() - start) * 1000, **tags)
+
+    def end_cycle(self, **info):
+        """Flush the spans collected since the last call as one JSON line."""
+        with self.lock:
+            spans, self.spans = self.spans, []
+            self.cycle += 1
+            line = {"cycle": self.cycle, "ts": round(time.time(), 3), "spans": spans}
+            line.update(info)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(line) + "\n")
+        return line
+
+
+recorder = MetricsRecorder()
+span = recorder.span
+record = recorder.record
+end_cycle = recorder.end_cycle
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[k]
+
+
+def summarize(lines):
+    """Returns {phase: sorted [ms, ...]} over all cycles."""
+    phases = {}
+    for line in lines:
+        for entry in line.get("spans", []):
+            phases.setdefault(entry["phase"], []).append(entry["ms"])
+    for values in phases.values():
+        values.sort()
+    return phases
+
+
+def load(path):
+    lines = []
+    with open(path) as f:
+        for raw in f:
+            raw = raw.strip()
+            if raw:
+                lines.append(json.loads(raw))
+    return lines
+
+
+def report(path, out=sys.stdout):
+    lines = load(path)
+    phases = summarize(lines)
+    out.write(f"{len(lines)} cycles from {path}\n")
+    out.write(f"{'PHASE':<24}{'COUNT':>8}{'P50 ms':>12}{'P95 ms':>12}{'MAX ms':>12}\n")
+    for phase in sorted(phases):
+        values = phases[phase]
+        out.write(f"{phase:<24}{len(values):>8}{percentile(values, 50):>12.1f}{percentile(values, 95):>12.1f}{values[-1]:>12.1f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print p50/p95/max per phase from a metrics JSONL file.")
+    parser.add_argument("path", nargs="?", default=METRICS_FILE)
+    args = parser.parse_args()
+    report(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Configuration ---
+COOKIE_TTL = 600  # seconds before cookies are proactively refreshed
+REQUEST_TIMEOUT = 10  # seconds per HTTP request
+POOL_SIZE = 8  # keep-alive connections kept open to NSE (one per concurrently fetched list)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+
+class NSESessionRejected(Exception):
+    """NSE refused the session (401/403 or a non-JSON bot page) even after a cookie refresh."""
+
+
+class NSEHttpClient:
+    """
+    Persistent keep-alive session against NSE's JSON endpoints.
+    NSE only answers /api/* calls that carry the cookies handed out by the
+    HTML pages, so the session is warmed up on those pages first and
+    re-warmed whenever the cookies age out or a call is rejected.
+    Safe to share between threads: warm-ups are serialized and a rejection
+    seen by several threads at once triggers a single refresh.
+    """
+
+    def __init__(self, base_url, referer_path, cookie_ttl=COOKIE_TTL, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.referer = self.base_url + referer_path
+        self.cookie_ttl = cookie_ttl
+        self.timeout = timeout
+        self.session = None
+        self.warmed_at = 0.0
+        self.generation = 0  # bumped on every warm-up
+        self.warm_lock = threading.Lock()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session
+
+    def warm_up(self):
+        # Fresh session so stale/blacklisted cookies never survive a refresh
+        session = self._new_session()
+        try:
+            for url in (self.base_url + "/", self.referer):
+                resp = session.get(url, timeout=self.timeout)
+                if resp.status_code in (401, 403):
+                    raise NSESessionRejected(f"NSE rejected the warm-up ({resp.status_code} on {url})")
+                resp.raise_for_status()
+        except Exception:
+            # A blocked or failed warm-up must not replace a session that still works
+            session.close()
+            raise
+        old, self.session = self.session, session
+        self.warmed_at = time.monotonic()
+        self.generation += 1
+        # Closing only drops its idle pooled connections; a request still in flight on another
+        # thread finishes and its connection is discarded instead of returned to the pool
+        if old:
+            old.close()
+        logging.info(f"NSE session warmed up ({len(session.cookies)} cookies).")
+
+    def _refresh(self, seen_generation):
+        with self.warm_lock:
+            if self.generation == seen_generation:
+                self.warm_up()
+
+    def _cookies_stale(self):
+        return self.session is None or time.monotonic() - self.warmed_at > self.cookie_ttl
+
+    def _request_json(self, session, path, params):
+        resp = session.get(
+            self.base_url + path,
+            params=params,
+            headers={"Referer": self.referer},
+            timeout=self.timeout,
+        )
+        if resp.status_code in (401, 403):
+            return None
+        resp.raise_for_status()
+        try:
+            return resp.json()
+        except ValueError:
+            # Akamai serves an HTML challenge page with 200 when it dislikes the session
+            return None
+
+    def get_json(self, path, params=None):
+        if self._cookies_stale():
+            self._refresh(self.generation)
+
+        generation, session = self.generation, self.session
+        data = self._request_json(session, path, params)
+        if data is None:
+            logging.info("NSE rejected session, refreshing cookies...")
+            self._refresh(generation)
+            data = self._request_json(self.session, path, params)
+        if data is None:
+            raise NSESessionRejected(f"NSE rejected {path} after cookie refresh")
+        return data
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
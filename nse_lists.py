@@ -0,0 +1,122 @@
+"""
+Several NSE live-analysis lists fetched in parallel and merged into one ranking.
+
+Each list is read through the shared NSEHttpClient on its own worker thread,
+so a refresh costs about as much as the slowest list instead of the sum of all
+of them. Every list contributes `weight * (1 - rank / length)` per symbol; a
+symbol that shows up on several lists adds up its scores, so the grid holds
+the strongest overall candidates rather than just the top of one page.
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from nse_client import NSESessionRejected
+import metrics
+
+# name -> (API path, query params, where the rows live in the response)
+NSE_LISTS = {
+    "volume_spurts": ("/api/live-analysis-volume-gainers", None, ("data",)),
+    "gainers": ("/api/live-analysis-variations", {"index": "gainers"}, ("allSec", "data")),
+    "losers": ("/api/live-analysis-variations", {"index": "loosers"}, ("allSec", "data")),  # sic, NSE's spelling
+    "oi_spurts": ("/api/live-analysis-oi-spurts-underlyings", None, ("data",)),
+    "52w_high": ("/api/live-analysis-data-52weekhighstock", None, ("data",)),
+}
+
+DEFAULT_WEIGHTS = {
+    "volume_spurts": 1.0,
+    "gainers": 0.5,
+    "losers": 0.3,
+    "oi_spurts": 0.4,
+    "52w_high": 0.3,
+}
+
+
+def parse_weights(spec, default=DEFAULT_WEIGHTS):
+    """'volume_spurts=1,gainers=0.5' -> dict. Empty spec gives `default`; weight 0 disables a list."""
+    if not spec.strip():
+        return dict(default)
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in NSE_LISTS:
+            raise ValueError(f"Unknown NSE list '{name}' (known: {', '.join(NSE_LISTS)})")
+        weights[name] = float(value or 1)
+    return weights
+
+
+def list_rows(data, where):
+    for key in where:
+        data = (data or {}).get(key)
+    return [row for row in (data or []) if isinstance(row, dict) and row.get("symbol")]
+
+
+def merge_rankings(rankings, weights, bonus=None):
+    """
+    rankings: {list name: [symbol, ...] best first}. Returns symbols ordered by
+    combined score (ties keep the order of first appearance). `bonus` ({symbol: score},
+    e.g. from snapshot_store persistence) is added to symbols that are listed right now.
+    """
+    scores = {}
+    for name, symbols in rankings.items():
+        weight = weights.get(name, 0)
+        n = len(symbols)
+        for rank, symbol in enumerate(symbols):
+            scores[symbol] = scores.get(symbol, 0.0) + weight * (1 - rank / n)
+    for symbol, extra in (bonus or {}).items():
+        if symbol in scores:
+            scores[symbol] += extra
+    return sorted(scores, key=lambda sym: -scores[sym])
+
+
+class MultiListFetcher:
+    def __init__(self, http, weights=DEFAULT_WEIGHTS):
+        self.http = http
+        self.weights = {name: w for name, w in weights.items() if w > 0}
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(self.weights)), thread_name_prefix="nse-list")
+        self.last = {}  # list name -> rows, lists that succeeded in the last fetch
+
+    def _fetch_one(self, name):
+        path, params, where = NSE_LISTS[name]
+        started = time.perf_counter()
+        ok = False
+        try:
+            rows = list_rows(self.http.get_json(path, params), where)
+            ok = True
+            return rows
+        finally:
+            metrics.record("nse_list", (time.perf_counter() - started) * 1000, list=name, ok=ok)
+
+    def fetch(self):
+        """
+        Fetches every enabled list concurrently. Returns {name: rows}; lists that failed are
+        left out. Raises NSESessionRejected only when NSE rejected every list.
+        """
+        futures = {name: self.pool.submit(self._fetch_one, name) for name in self.weights}
+        results, rejected = {}, 0
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except NSESessionRejected as e:
+                rejected += 1
+                logging.warning(f"NSE list '{name}' rejected: {e}")
+            except Exception as e:
+                logging.warning(f"NSE list '{name}' failed: {e}")
+        if rejected and rejected == len(futures):
+            raise NSESessionRejected("NSE rejected every list after cookie refresh")
+        self.last = results
+        return results
+
+    def top_symbols(self, limit, bonus=None):
+        results = self.fetch()
+        rankings = {name: [row["symbol"].strip() for row in rows] for name, rows in results.items()}
+        merged = merge_rankings(rankings, self.weights, bonus)[:limit]
+        logging.info(
+            f"Merged {len(merged)} symbols from {len(rankings)}/{len(self.weights)} NSE lists "
+            f"({', '.join(f'{name}={len(r)}' for name, r in rankings.items())})."
+        )
+        return merged
+
+    def close(self):
+        self.pool.shutdown(wait=False)
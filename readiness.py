@@ -0,0 +1,108 @@
+"""
+Event-driven readiness waits.
+
+Every wait polls an in-page signal (or the CDP network stream) with
+WebDriverWait, returns as soon as the condition holds and records how long it
+actually took as a `wait_<label>` metrics span. A wait that times out is
+logged and returns None instead of raising, so callers can degrade instead of
+aborting a whole update.
+"""
+import time
+import logging
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import metrics
+
+POLL_INTERVAL = 0.05  # seconds between condition checks
+
+
+def wait_for(driver, condition, timeout, label, poll=POLL_INTERVAL, **tags):
+    """Polls `condition(driver)` until truthy. Returns its value, or None on timeout."""
+    started = time.perf_counter()
+    try:
+        value = WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+        ok = True
+    except TimeoutException:
+        value = None
+        ok = False
+    elapsed = (time.perf_counter() - started) * 1000
+    metrics.record(f"wait_{label}", elapsed, ok=ok, **tags)
+    if not ok:
+        logging.warning(f"Wait '{label}' timed out after {elapsed:.0f} ms.")
+    return value
+
+
+def js(script, *args):
+    """Condition that is true when `script` (a 'return ...' body) returns truthy."""
+    return lambda driver: driver.execute_script(script, *args)
+
+
+def network_idle(tracker, quiet=0.25, frame_id=None):
+    return lambda driver: tracker.is_idle(quiet, frame_id)
+
+
+# --- In-page signals --------------------------------------------------------
+
+# Top document: grid written
+GRID_READY_JS = "return !!document.getElementById('tab-0');"
+
+# Inside a chart frame (markers are set by the frame setup script)
+CANVAS_READY_JS = "return window.__canvasReady === true;"
+FRAME_FOCUSED_JS = "return document.hasFocus();"
+SEARCH_TYPED_JS = """
+var el = document.activeElement;
+return !!el && el.tagName === 'INPUT' && el.value.toLowerCase() === arguments[0];
+"""
+# 'confirmed' when the chart reports the symbol, 'unknown' when it has no symbol marker
+# (keystrokes went in but can't be verified: callers must NOT treat that as success)
+SYMBOL_LOADED_JS = """
+var active = window.__chartSymbol;
+if (active === undefined) return 'unknown';
+return String(active).split(':').pop().toLowerCase() === arguments[0] ? 'confirmed' : false;
+"""
+
+# Installed into every chart frame by the frame setup script (see main.FRAME_SETUP_JS)
+FRAME_MARKERS_JS = """
+    // 3. READINESS MARKERS
+    // __canvasReady: the chart canvas exists (DOM-level, works even without the widget API)
+    // __chartSymbol / __symbolLoadedAt: updated by the chart itself when a symbol finishes loading
+    var hookWidget = function() {
+        var widget = window.tvWidget || window.widget;
+        if (!widget || !widget.onChartReady || window.__widgetHooked) return !!window.__widgetHooked;
+        window.__widgetHooked = true;
+        widget.onChartReady(function() {
+            try {
+                var chart = widget.activeChart();
+                window.__chartSymbol = chart.symbol();
+                window.__symbolLoadedAt = Date.now();
+                chart.onSymbolChanged().subscribe(null, function() {
+                    window.__chartSymbol = chart.symbol();
+                    window.__symbolLoadedAt = Date.now();
+                });
+            } catch (e) {}
+        });
+        return true;
+    };
+    var observer = new MutationObserver(function() {
+        if (!window.__canvasReady && document.querySelector('canvas')) window.__canvasReady = true;
+        if (window.__canvasReady && hookWidget()) observer.disconnect();
+    });
+    observer.observe(document, {childList: true, subtree: true});
+
+    // 4. HEALTH MARKERS (read by health.HealthMonitor)
+    // __heartbeat: bumped every second while the frame's event loop runs (frozen frame = stale)
+    // __lastRender: last painted animation frame (only advances while the page is shown)
+    // __errors / __lastError: uncaught errors and rejections
+    window.__errors = 0;
+    var onError = function(message) {
+        window.__errors++;
+        window.__lastError = String(message).slice(0, 200);
+    };
+    window.addEventListener('error', function(e) { onError(e.message); });
+    window.addEventListener('unhandledrejection', function(e) { onError(e.reason); });
+    setInterval(function() {
+        window.__heartbeat = Date.now();
+        requestAnimationFrame(function() { window.__lastRender = Date.now(); });
+    }, 1000);
+"""
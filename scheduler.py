@@ -0,0 +1,186 @@
+"""
+Pipelined refresh scheduler.
+
+The fetcher and the grid run as two asyncio workers:
+
+    fetch worker:  on every wall-clock aligned tick (09:15, 09:20, ...) fetch a ranking
+                   and drop it into a single-slot mailbox (newest wins).
+    render worker: take the newest ranking and push it to the grid.
+
+A slow grid update therefore never delays the next fetch, and a ranking that
+went stale while the grid was busy is dropped instead of rendered. Both
+workers idle outside NSE market hours.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from datetime import time as dtime
+
+import metrics
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+# Optional list of trading holidays, one YYYY-MM-DD per line (# comments allowed)
+HOLIDAYS_FILE = os.environ.get("NSE_HOLIDAYS_FILE", "nse_holidays.txt")
+
+
+class BrowserClosed(Exception):
+    pass
+
+
+def load_holidays(path=HOLIDAYS_FILE):
+    holidays = set()
+    if not os.path.exists(path):
+        return holidays
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                holidays.add(datetime.strptime(line, "%Y-%m-%d").date())
+    return holidays
+
+
+class MarketCalendar:
+    """NSE equity session: Mon-Fri 09:15-15:30 IST, minus listed holidays."""
+
+    def __init__(self, open_time=MARKET_OPEN, close_time=MARKET_CLOSE, holidays=None):
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = load_holidays() if holidays is None else set(holidays)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, now=None):
+        now = (now or datetime.now(IST)).astimezone(IST)
+        return self.is_trading_day(now.date()) and self.open_time <= now.time() < self.close_time
+
+    def next_open(self, now=None):
+        now = (now or datetime.now(IST)).astimezone(IST)
+        day = now.date()
+        if now.time() >= self.open_time:
+            day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return datetime.combine(day, self.open_time, IST)
+
+
+class AlwaysOpen:
+    """Calendar for testing/off-hours runs."""
+
+    def is_open(self, now=None):
+        return True
+
+    def next_open(self, now=None):
+        return now or datetime.now(IST)
+
+
+def next_tick(interval, now=None):
+    """Next wall-clock instant (IST) that is a multiple of `interval` seconds since midnight."""
+    now = now if now is not None else time.time()
+    offset = IST.utcoffset(None).total_seconds()
+    return ((now + offset) // interval + 1) * interval - offset
+
+
+class LatestMailbox:
+    """Single-slot queue: put() replaces whatever has not been consumed yet."""
+
+    def __init__(self):
+        self.item = None
+        self.event = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, item):
+        if self.item is not None:
+            self.dropped += 1
+            logging.info(f"Dropping stale ranking from tick {self.item[0]}: a fresher one arrived.")
+        self.item = item
+        self.event.set()
+
+    def has_pending(self):
+        return self.item is not None
+
+    async def get(self):
+        await self.event.wait()
+        item, self.item = self.item, None
+        self.event.clear()
+        return item
+
+
+class RefreshScheduler:
+    """
+    fetch():                 -> list of symbols (blocking, run in a worker thread)
+    render(symbols, abort):  pushes symbols to the grid; should poll abort() between
+                             slow steps and stop early when it returns True
+    is_alive():              -> False once the grid browser is gone. Checked every second,
+                             also during renders, so it must not wait on the driver.
+    """
+
+    def __init__(self, fetch, render, is_alive, interval, calendar=None):
+        self.fetch = fetch
+        self.render = render
+        self.is_alive = is_alive
+        self.interval = interval
+        self.calendar = calendar or MarketCalendar()
+        self.mailbox = None
+
+    async def _sleep_until(self, wall_time):
+        await asyncio.sleep(max(0.0, wall_time - time.time()))
+
+    async def _wait_for_market(self):
+        if self.calendar.is_open():
+            return
+        opens = self.calendar.next_open()
+        logging.info(f"Market closed. Waiting until {opens:%a %d %b %H:%M} IST...")
+        await self._sleep_until(opens.timestamp())
+
+    async def fetch_worker(self):
+        # First fetch runs immediately, then on aligned ticks
+        tick = time.time()
+        while True:
+            await self._wait_for_market()
+            if time.time() < tick:
+                await self._sleep_until(tick)
+            label = datetime.fromtimestamp(max(tick, time.time()), IST).strftime("%H:%M:%S")
+            symbols = await asyncio.to_thread(self.fetch)
+            if symbols:
+                self.mailbox.put((label, symbols))
+            else:
+                logging.warning("No symbols fetched.")
+            tick = next_tick(self.interval)
+            logging.info(f"Next fetch at {datetime.fromtimestamp(tick, IST):%H:%M:%S} IST.")
+
+    async def render_worker(self):
+        while True:
+            label, symbols = await self.mailbox.get()
+            logging.info(f"Rendering ranking from tick {label}...")
+            await asyncio.to_thread(self.render, symbols, self.mailbox.has_pending)
+            metrics.end_cycle(tick=label, symbols=len(symbols), dropped=self.mailbox.dropped)
+
+    async def watch_worker(self):
+        # verify browser is still open
+        while True:
+            await asyncio.sleep(1)
+            if not await asyncio.to_thread(self.is_alive):
+                raise BrowserClosed("Browser closed.")
+
+    async def run(self):
+        self.mailbox = LatestMailbox()
+        tasks = [
+            asyncio.create_task(self.fetch_worker()),
+            asyncio.create_task(self.render_worker()),
+            asyncio.create_task(self.watch_worker()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            # A render that blew up because the browser died is a BrowserClosed, not a crash
+            if not await asyncio.to_thread(self.is_alive):
+                raise BrowserClosed("Browser closed.")
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,63 @@
+from collections import namedtuple
+
+# updates: [(frame_id, symbol)] frames that must be retyped, in frame order
+# skipped: frames already showing their symbol (no browser work needed)
+# vacated: frames whose symbol left the list and got no replacement (left as-is)
+SlotPlan = namedtuple("SlotPlan", ["updates", "skipped", "vacated"])
+
+
+class SlotAssigner:
+    """
+    Persistent symbol -> frame map for the chart grid.
+
+    A symbol keeps its frame for as long as it stays in the list, whatever its
+    rank, so a refresh only has to touch the frames whose symbol dropped out.
+    Symbols entering the list take over those freed frames.
+    """
+
+    def __init__(self, frame_ids):
+        self.frame_ids = list(frame_ids)
+        self.order = {fid: i for i, fid in enumerate(self.frame_ids)}
+        self.assigned = {}  # symbol -> frame id it owns
+        self.shown = {}  # frame id -> symbol the frame is actually displaying
+
+    def plan(self, symbols):
+        wanted = []
+        for sym in symbols:
+            if sym not in wanted:
+                wanted.append(sym)
+        wanted = wanted[:len(self.frame_ids)]
+        wanted_set = set(wanted)
+
+        previous = set(self.assigned.values())
+        self.assigned = {sym: fid for sym, fid in self.assigned.items() if sym in wanted_set}
+
+        taken = set(self.assigned.values())
+        free = [fid for fid in self.frame_ids if fid not in taken]
+        # A frame still displaying its symbol (it left and came back) needs no edit. Those are
+        # handed out first, so a higher-ranked newcomer never takes a frame that can be reused.
+        for fid in list(free):
+            sym = self.shown.get(fid)
+            if sym in wanted_set and sym not in self.assigned:
+                free.remove(fid)
+                self.assigned[sym] = fid
+        for sym in wanted:
+            if sym not in self.assigned:
+                self.assigned[sym] = free.pop(0)
+
+        updates = sorted(
+            ((fid, sym) for sym, fid in self.assigned.items() if self.shown.get(fid) != sym),
+            key=lambda u: self.order[u[0]],
+        )
+        skipped = len(self.assigned) - len(updates)
+        vacated = [fid for fid in free if fid in previous]
+        return SlotPlan(updates, skipped, vacated)
+
+    def confirm(self, fid, symbol):
+        """Record that `fid` now displays `symbol` (call only after a successful update)."""
+        self.shown[fid] = symbol
+
+    def restore(self, shown):
+        """Seed the map from {frame id: symbol} already on screen (re-attached or persisted grid)."""
+        self.shown = {fid: sym for fid, sym in shown.items() if fid in self.order}
+        self.assigned = {sym: fid for fid, sym in self.shown.items()}
@@ -0,0 +1,257 @@
+"""
+Append-only columnar store of every fetched NSE ranking.
+
+Each fetch appends one fixed-size record per table row to `rows.bin`
+(cycle, timestamp, list, rank, symbol id, volume, avg volume, % change, about
+40 bytes a row). Symbols are interned: `symbols.txt` holds one symbol per line
+and its line number is the id stored in the rows. Reads memory-map the row
+file, so queries over months of 5-minute snapshots are plain NumPy array
+operations and never parse anything.
+
+Summary of a store:
+    python snapshot_store.py [snapshots/] [--top 24] [--window 12]
+"""
+import os
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from nse_lists import NSE_LISTS
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+
+ROW_DTYPE = np.dtype([
+    ("cycle", "<u4"),
+    ("ts", "<f8"),          # epoch seconds of the fetch
+    ("list", "u1"),         # index into LIST_NAMES
+    ("rank", "<u2"),        # 0 = top of that list
+    ("symbol", "<u4"),      # line in symbols.txt
+    ("volume", "<f8"),      # NaN when the list has no such column
+    ("avg_volume", "<f8"),
+    ("change", "<f4"),      # % change
+])
+
+# Append-only: new lists go at the END, ids are stored on disk.
+# "grid" is not an NSE list: it records the symbols the grid was showing, in slot order.
+LIST_NAMES = list(NSE_LISTS) + ["grid"]
+LIST_IDS = {name: i for i, name in enumerate(LIST_NAMES)}
+
+# list name -> (volume, avg volume, % change) keys of its API rows
+ROW_FIELDS = {
+    "volume_spurts": ("volume", "week1AvgVolume", "pChange"),
+    "gainers": ("trade_quantity", None, "net_price"),
+    "losers": ("trade_quantity", None, "net_price"),
+    "oi_spurts": ("volume", None, None),
+    "52w_high": (None, None, "pChange"),
+}
+
+
+def _num(value):
+    if value is None:
+        return np.nan
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+class SnapshotStore:
+    def __init__(self, path=SNAPSHOT_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.rows_file = os.path.join(path, "rows.bin")
+        self.symbols_file = os.path.join(path, "symbols.txt")
+        self.symbols = []
+        self.ids = {}
+        if os.path.exists(self.symbols_file):
+            with open(self.symbols_file) as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        self._intern_loaded(line[:-1])
+        self._repair()
+        self._view = None
+        self._view_size = -1
+        rows = self.rows()
+        self.next_cycle = int(rows["cycle"][-1]) + 1 if len(rows) else 0
+
+    def _repair(self):
+        """
+        Cuts what a crash mid-write left behind: a torn trailing row (appending after it would
+        shift every later record) and a symbol line without its newline (never referenced,
+        symbols are written before their rows).
+        """
+        if os.path.exists(self.rows_file):
+            size = os.path.getsize(self.rows_file)
+            if size % ROW_DTYPE.itemsize:
+                logging.warning(f"Dropping {size % ROW_DTYPE.itemsize} bytes of a torn row in {self.rows_file}.")
+                os.truncate(self.rows_file, size - size % ROW_DTYPE.itemsize)
+        if os.path.exists(self.symbols_file):
+            complete = sum(len(sym.encode()) + 1 for sym in self.symbols)
+            if os.path.getsize(self.symbols_file) != complete:
+                os.truncate(self.symbols_file, complete)
+
+    def _intern_loaded(self, symbol):
+        self.ids[symbol] = len(self.symbols)
+        self.symbols.append(symbol)
+
+    def intern(self, symbols):
+        """Symbol ids, assigning (and persisting) new ones as needed."""
+        new = [sym for sym in dict.fromkeys(symbols) if sym not in self.ids]
+        if new:
+            # Written before the rows that reference them, so ids never dangle after a crash
+            with open(self.symbols_file, "a") as f:
+                f.write("".join(sym + "\n" for sym in new))
+            for sym in new:
+                self._intern_loaded(sym)
+        return [self.ids[sym] for sym in symbols]
+
+    def append(self, tables, ts=None):
+        """
+        Appends one cycle. `tables` is {list name: [API row dict, ...] best first}; rows only
+        need a "symbol", missing numeric columns are stored as NaN. Returns the cycle number.
+        """
+        ts = time.time() if ts is None else ts
+        chunks = []
+        for name, rows in tables.items():
+            if name not in LIST_IDS or not rows:
+                continue
+            vol_key, avg_key, chg_key = ROW_FIELDS.get(name, (None, None, None))
+            chunk = np.zeros(len(rows), dtype=ROW_DTYPE)
+            chunk["list"] = LIST_IDS[name]
+            chunk["rank"] = np.arange(len(rows))
+            chunk["symbol"] = self.intern([row["symbol"].strip() for row in rows])
+            chunk["volume"] = [_num(row.get(vol_key)) if vol_key else np.nan for row in rows]
+            chunk["avg_volume"] = [_num(row.get(avg_key)) if avg_key else np.nan for row in rows]
+            chunk["change"] = [_num(row.get(chg_key)) if chg_key else np.nan for row in rows]
+            chunks.append(chunk)
+        if not chunks:
+            return None
+        block = np.concatenate(chunks)
+        block["cycle"] = self.next_cycle
+        block["ts"] = ts
+        with open(self.rows_file, "ab") as f:
+            f.write(block.tobytes())
+        self.next_cycle += 1
+        return self.next_cycle - 1
+
+    def rows(self):
+        """Every stored row as a read-only structured array (memory-mapped, re-mapped on growth)."""
+        size = os.path.getsize(self.rows_file) if os.path.exists(self.rows_file) else 0
+        count = size // ROW_DTYPE.itemsize  # ignores a torn trailing record
+        if count == 0:
+            return np.zeros(0, dtype=ROW_DTYPE)
+        if size != self._view_size:
+            self._view = np.memmap(self.rows_file, dtype=ROW_DTYPE, mode="r", shape=(count,))
+            self._view_size = size
+        return self._view
+
+    def _select(self, list_name=None, window=None):
+        rows = self.rows()
+        if window and len(rows):
+            # Cycles are appended in order, so the last `window` cycles are a suffix
+            start = np.searchsorted(rows["cycle"], max(0, int(rows["cycle"][-1]) - window + 1))
+            rows = rows[start:]
+        if list_name is not None:
+            rows = rows[rows["list"] == LIST_IDS[list_name]]
+        else:
+            # "Any list" means the NSE lists; the grid record would count shown symbols twice
+            rows = rows[rows["list"] != LIST_IDS["grid"]]
+        return rows
+
+    def cycles(self):
+        rows = self.rows()
+        return int(rows["cycle"][-1] - rows["cycle"][0] + 1) if len(rows) else 0
+
+    # --- Queries ------------------------------------------------------------
+
+    def presence(self, top=24, list_name=None, window=None):
+        """
+        Boolean matrix [cycle, symbol id]: symbol was ranked < `top` (in any list, or in
+        `list_name`) during that cycle. Rows cover the last `window` cycles. Returns (cycles, matrix).
+        """
+        rows = self._select(list_name, window)
+        rows = rows[rows["rank"] < top]
+        if not len(rows):
+            return np.zeros(0, dtype=np.uint32), np.zeros((0, len(self.symbols)), dtype=bool)
+        cycles, cycle_idx = np.unique(rows["cycle"], return_inverse=True)
+        matrix = np.zeros((len(cycles), len(self.symbols)), dtype=bool)
+        matrix[cycle_idx, rows["symbol"]] = True
+        return cycles, matrix
+
+    def persistence(self, top=24, list_name=None, window=None):
+        """{symbol: share of cycles (in the window) it spent ranked < `top`}."""
+        cycles, matrix = self.presence(top, list_name, window)
+        if not len(cycles):
+            return {}
+        share = matrix.mean(axis=0)
+        held = np.nonzero(share)[0]
+        return {self.symbols[i]: float(share[i]) for i in held}
+
+    def first_seen(self, list_name=None):
+        """{symbol: epoch seconds it first appeared in any (or the given) list}."""
+        rows = self._select(list_name)
+        if not len(rows):
+            return {}
+        ids, first = np.unique(rows["symbol"], return_index=True)
+        ts = rows["ts"][first]
+        return {self.symbols[i]: float(t) for i, t in zip(ids, ts)}
+
+    def churn(self, top=24, list_name=None, window=None):
+        """(cycles, entered): symbols that entered the top `top` in each cycle vs the previous one."""
+        cycles, matrix = self.presence(top, list_name, window)
+        if len(cycles) < 2:
+            return cycles[1:], np.zeros(0, dtype=int)
+        entered = (matrix[1:] & ~matrix[:-1]).sum(axis=1)
+        return cycles[1:], entered
+
+    def streaks(self, top=24, list_name=None):
+        """{symbol: consecutive most recent cycles ranked < `top`} for symbols currently in the top."""
+        cycles, matrix = self.presence(top, list_name)
+        if not len(cycles):
+            return {}
+        # Length of the trailing run of True per column
+        reversed_rows = matrix[::-1]
+        broken = ~reversed_rows
+        run = np.where(broken.any(axis=0), broken.argmax(axis=0), len(cycles))
+        current = np.nonzero(run)[0]
+        return {self.symbols[i]: int(run[i]) for i in current}
+
+
+def report(store, top=24, window=12):
+    rows = store.rows()
+    print(f"{len(rows)} rows, {store.cycles()} cycles, {len(store.symbols)} symbols in {store.path} "
+          f"({os.path.getsize(store.rows_file) / 1024:.0f} KiB)" if len(rows) else f"Empty store at {store.path}")
+    if not len(rows):
+        return
+    print(f"Span: {time.strftime('%Y-%m-%d %H:%M', time.localtime(rows['ts'][0]))} -> "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(rows['ts'][-1]))}")
+
+    persistence = store.persistence(top, window=window)
+    streaks = store.streaks(top)
+    first_seen = store.first_seen()
+    print(f"\nMost persistent in top {top}, last {window} cycles:")
+    print(f"{'SYMBOL':<16}{'SHARE':>8}{'STREAK':>8}  FIRST SEEN")
+    for sym in sorted(persistence, key=lambda s: -persistence[s])[:top]:
+        seen = time.strftime('%Y-%m-%d %H:%M', time.localtime(first_seen[sym]))
+        print(f"{sym:<16}{persistence[sym]:>8.2f}{streaks.get(sym, 0):>8}  {seen}")
+
+    _, entered = store.churn(top, window=window)
+    if len(entered):
+        print(f"\nChurn (new symbols in top {top} per cycle), last {window} cycles: "
+              f"avg={entered.mean():.1f} max={entered.max()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the NSE ranking snapshot store.")
+    parser.add_argument("path", nargs="?", default=SNAPSHOT_DIR)
+    parser.add_argument("--top", type=int, default=24, help="rank cut-off (grid size)")
+    parser.add_argument("--window", type=int, default=12, help="recent cycles to analyse (12 = one hour)")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    report(SnapshotStore(args.path), args.top, args.window)
+
+
+if __name__ == "__main__":
+    main()
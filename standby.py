@@ -0,0 +1,129 @@
+"""
+Warm standby frames (double buffering for the chart grid).
+
+A hidden pool of chart iframes is kept loaded with the symbols ranked just
+below the grid cut-off. When one of them enters the grid, its standby frame is
+moved into the slot instead of the slot reloading, so the chart appears with
+no load latency. The frame it replaces drops into the pool and is reused for
+the next standby symbol.
+
+Moving uses Node.moveBefore() (atomic move, keeps the iframe document alive).
+Browsers without it fall back to insertBefore, which still works but reloads
+the frame.
+"""
+import logging
+
+# Off-screen but laid out at chart size: display:none would stop the charts from rendering
+POOL_STYLE = """
+    #standby-pool { position: absolute; left: -10000px; top: 0; width: 33vw; height: 50vh; overflow: hidden; }
+    #standby-pool iframe { position: absolute; top: 0; left: 0; }
+"""
+
+# arguments: slot frame id, standby frame id. Returns 'moved', 'reinserted' or null.
+SWAP_IN_JS = """
+var slot = document.getElementById(arguments[0]), standby = document.getElementById(arguments[1]);
+if (!slot || !standby) return null;
+var page = slot.parentNode, pool = standby.parentNode;
+var atomic = typeof page.moveBefore === 'function';
+var move = function(parent, node, ref) {
+    if (atomic) parent.moveBefore(node, ref); else parent.insertBefore(node, ref);
+};
+var marker = slot.nextSibling;
+move(pool, slot, null);
+move(page, standby, marker);
+
+// Ids follow the position: the slot id now names the warm frame
+var slotId = slot.id;
+slot.id = standby.id;
+standby.id = slotId;
+
+// A never-loaded slot frame entering the pool must load (the pool is always live)
+var pending = slot.getAttribute('data-pending-src');
+if (pending) {
+    slot.removeAttribute('data-pending-src');
+    slot.src = pending;
+}
+return atomic ? 'moved' : 'reinserted';
+"""
+
+# arguments: [[standby frame id, symbol], ...]. Switches loaded charts via their API,
+# (re)loads blank ones. Fire-and-forget: the pool has until the next tick to warm up.
+REFILL_JS = """
+arguments[0].forEach(function(item) {
+    var el = document.getElementById(item[0]);
+    if (!el) return;
+    var widget = null;
+    try { widget = el.contentWindow.tvWidget || el.contentWindow.widget; } catch (e) {}
+    el.setAttribute('data-symbol', item[1]);
+    if (widget && widget.activeChart && el.getAttribute('src') !== 'about:blank') {
+        try {
+            widget.onChartReady(function() { widget.activeChart().setSymbol('NSE:' + item[1]); });
+            return;
+        } catch (e) {}
+    }
+    el.src = window.CHART_URL + '/?symbol=NSE:' + encodeURIComponent(item[1]);
+});
+"""
+
+
+class StandbyPool:
+    def __init__(self, grid, size):
+        self.grid = grid
+        self.size = size
+        self.frame_ids = [f"standby-frame-{k}" for k in range(size)]
+        self.shown = {}  # standby frame id -> symbol it is loaded with
+
+    def html(self):
+        if not self.size:
+            return ""
+        frames = "".join(f'<iframe id="{fid}" src="about:blank" allow="autoplay; encrypted-media"></iframe>' for fid in self.frame_ids)
+        return f'<div id="standby-pool">{frames}</div>'
+
+    def frame_of(self, symbol):
+        return next((fid for fid, sym in self.shown.items() if sym == symbol), None)
+
+    def promote(self, updates):
+        """
+        Swaps warm standby frames into the slots of `updates` ([(slot id, symbol)]) where possible.
+        Returns the updates that were satisfied by a swap.
+        """
+        swapped = []
+        for fid, symbol in updates:
+            standby_id = self.frame_of(symbol)
+            if not standby_id:
+                continue
+            try:
+                how = self.grid.driver.execute_script(SWAP_IN_JS, fid, standby_id)
+            except Exception as e:
+                logging.warning(f"Standby swap {standby_id} -> {fid} failed: {e}")
+                continue
+            if not how:
+                continue
+            # The displaced frame now lives in the pool under standby_id
+            old_symbol = self.grid.slots.shown.get(fid)
+            if old_symbol:
+                self.shown[standby_id] = old_symbol
+            else:
+                self.shown.pop(standby_id, None)
+            swapped.append((fid, symbol))
+            logging.info(f"Promoted standby {symbol} into {fid} ({how}).")
+        return swapped
+
+    def refill(self, candidates, on_grid):
+        """Keeps the pool loaded with the best `candidates` not already on the grid."""
+        if not self.size:
+            return
+        wanted = [sym for sym in candidates if sym not in on_grid][:self.size]
+        keep = {fid for fid, sym in self.shown.items() if sym in wanted}
+        missing = [sym for sym in wanted if sym not in self.shown.values()]
+        free = [fid for fid in self.frame_ids if fid not in keep]
+        loads = list(zip(free, missing))
+        if not loads:
+            return
+        try:
+            self.grid.driver.execute_script(REFILL_JS, [list(load) for load in loads])
+            for fid, sym in loads:
+                self.shown[fid] = sym
+            logging.info(f"Standby pool warming: {', '.join(sym for _, sym in loads)}")
+        except Exception as e:
+            logging.warning(f"Standby refill failed: {e}")
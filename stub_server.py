@@ -0,0 +1,195 @@
+"""
+Local stand-in for nseindia.com (recorded responses from ./recordings) and for
+the tv.dhan.co chart page (fake chart under /chart/).
+
+Usage:
+    python stub_server.py --port 8765
+    NSE_BASE_URL=http://127.0.0.1:8765 python debug_fetcher.py
+    DHAN_CHART_URL=http://127.0.0.1:8765/chart python main.py
+    INSTRUMENT_MASTER_URL=http://127.0.0.1:8765/api-data/api-scrip-master.csv python instruments.py SBIN
+
+Like the real site, /api/* calls are rejected with 401 unless the session
+first picked up the cookies handed out by the HTML pages.
+"""
+import os
+import sys
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+SESSION_COOKIE = "nsit"
+
+# Lightweight stand-in for a tv.dhan.co chart: canvas, type-to-search box,
+# symbol echo (legend/title) and the bits of the TradingView widget API that
+# DhanGrid uses (onChartReady, activeChart().setSymbol/symbol/onSymbolChanged).
+# ?latency=<ms> sets the simulated data load time (default 150 ms).
+CHART_PAGE = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>NSE:NIFTY</title>
+<style>
+  html, body { margin: 0; height: 100%; background: #131722; color: #d1d4dc; font: 12px sans-serif; overflow: hidden; }
+  .layout__area--top { height: 38px; background: #1e222d; }
+  #legend { position: absolute; top: 44px; left: 8px; font-size: 14px; }
+  #search { position: absolute; top: 30%; left: 30%; width: 40%; display: none; }
+  canvas { width: 100%; height: calc(100% - 38px); display: block; }
+</style></head>
+<body>
+<div class="layout__area--top">toolbar</div>
+<div id="legend"></div>
+<input id="search" autocomplete="off">
+<canvas id="chart"></canvas>
+<script>
+(function() {
+    var params = new URLSearchParams(location.search);
+    var current = params.get('symbol') || 'NSE:NIFTY';
+    var latency = parseInt(params.get('latency') || '150', 10);
+    var legend = document.getElementById('legend');
+    var search = document.getElementById('search');
+    var canvas = document.getElementById('chart');
+    var ready = false, readyCallbacks = [];
+
+    function draw() {
+        legend.textContent = current;
+        document.title = current;
+        var ctx = canvas.getContext('2d');
+        canvas.width = canvas.clientWidth; canvas.height = canvas.clientHeight;
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        var price = canvas.height / 2;
+        for (var x = 4; x < canvas.width; x += 8) {
+            var next = price + (Math.random() - 0.5) * 20;
+            ctx.fillStyle = next > price ? '#26a69a' : '#ef5350';
+            ctx.fillRect(x, Math.min(price, next), 5, Math.abs(next - price) + 1);
+            price = next;
+        }
+    }
+
+    var symbolListeners = [];
+    var chart = {
+        symbol: function() { return current; },
+        setSymbol: function(symbol, callback) {
+            setTimeout(function() {
+                current = symbol;
+                draw();
+                symbolListeners.forEach(function(fn) { fn(); });
+                if (callback) callback();
+            }, latency);
+        },
+        onSymbolChanged: function() {
+            return { subscribe: function(ctx, fn) { symbolListeners.push(fn); } };
+        }
+    };
+    window.tvWidget = {
+        onChartReady: function(fn) { if (ready) fn(); else readyCallbacks.push(fn); },
+        activeChart: function() { return chart; }
+    };
+    setTimeout(function() {
+        ready = true;
+        draw();
+        readyCallbacks.splice(0).forEach(function(fn) { fn(); });
+    }, latency);
+
+    // Type-to-search: first printable key opens the box, Enter applies it
+    document.addEventListener('keydown', function(e) {
+        if (e.target === search) {
+            if (e.key === 'Enter') {
+                var value = search.value.trim().toUpperCase();
+                search.value = '';
+                search.style.display = 'none';
+                if (value) chart.setSymbol('NSE:' + value);
+            }
+            return;
+        }
+        if (e.key.length === 1 && !e.ctrlKey && !e.metaKey) {
+            search.style.display = 'block';
+            search.focus();
+        }
+    });
+})();
+</script>
+</body></html>
+"""
+
+# path (or path?query when the query selects the data) -> (recording file or inline body, content type)
+ROUTES = {
+    "/": (None, "text/html; charset=utf-8"),
+    "/market-data/volume-gainers-spurts": ("volume_gainers.html", "text/html; charset=utf-8"),
+    "/api/live-analysis-volume-gainers": ("volume_gainers.json", "application/json"),
+    "/api/live-analysis-variations?index=gainers": ("gainers.json", "application/json"),
+    "/api/live-analysis-variations?index=loosers": ("losers.json", "application/json"),
+    "/api/live-analysis-oi-spurts-underlyings": ("oi_spurts.json", "application/json"),
+    "/api/live-analysis-data-52weekhighstock": ("52week_high.json", "application/json"),
+    "/api-data/api-scrip-master.csv": ("api-scrip-master.csv", "text/csv"),  # Dhan instrument master
+    "/chart/": (CHART_PAGE, "text/html; charset=utf-8"),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    reject_api = False  # flip to simulate Akamai blocking the session
+    overrides = {}  # path -> bytes served instead of the recording (benchmarks rotate rankings this way)
+
+    def _send(self, status, body, content_type, cookies=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for cookie in cookies:
+            self.send_header("Set-Cookie", f"{cookie}=stub; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path if self.path in ROUTES else self.path.split("?", 1)[0]
+        if path not in ROUTES:
+            self._send(404, b"not found", "text/plain")
+            return
+
+        source, content_type = ROUTES[path]
+        if path.startswith("/api/"):
+            if self.reject_api or SESSION_COOKIE not in self.headers.get("Cookie", ""):
+                self._send(401, b"{}", "application/json")
+                return
+            cookies = ()
+        else:
+            cookies = (SESSION_COOKIE, "nseappid")
+
+        if path in self.overrides:
+            body = self.overrides[path]
+        elif isinstance(source, bytes):
+            body = source
+        elif source:
+            with open(os.path.join(RECORDINGS_DIR, source), "rb") as f:
+                body = f.read()
+        else:
+            body = b"<html><body>NSE stub</body></html>"
+        self._send(200, body, content_type, cookies)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, handler=StubHandler):
+    """Start the stub in a daemon thread. Returns (server, base_url); call server.shutdown() to stop."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded NSE responses locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reject-api", action="store_true", help="answer every /api/ call with 401")
+    args = parser.parse_args()
+
+    StubHandler.reject_api = args.reject_api
+    server, base_url = start_stub_server(args.port)
+    print(f"NSE stub serving {RECORDINGS_DIR} at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Symbol extraction from the NSE volume-gainers table.
+
+Only the first column of ~30 rows is needed, so neither path looks at the
+rest of the page:
+
+    EXTRACT_SYMBOLS_JS   runs in the browser and returns a compact list of
+                         symbols in one execute_script call (no page_source
+                         serialization, no re-parse on the Python side).
+    parse_symbols_fast   regex scan over the SYMBOL table fragment only, for
+                         when all we have is HTML (page_source, snapshots).
+
+parse_symbols_bs4 is the previous full-document BeautifulSoup parser, kept as
+the benchmark baseline:
+
+    python table_parser.py [snapshot.html ...]
+    python table_parser.py --chrome     # also time the in-browser path (headless Chrome)
+"""
+import os
+import re
+import sys
+import html
+import time
+import argparse
+
+SNAPSHOTS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "volume_gainers.html")]
+
+# arguments[0] = max symbols. Returns null when no table has a SYMBOL header yet.
+EXTRACT_SYMBOLS_JS = """
+var limit = arguments[0];
+var tables = document.querySelectorAll('table');
+for (var t = 0; t < tables.length; t++) {
+    var headers = tables[t].querySelectorAll('th');
+    var found = false;
+    for (var h = 0; h < headers.length; h++) {
+        if (headers[h].textContent.toUpperCase().indexOf('SYMBOL') !== -1) { found = true; break; }
+    }
+    if (!found) continue;
+
+    var symbols = [];
+    var rows = tables[t].querySelectorAll('tbody tr');
+    for (var r = 0; r < rows.length && symbols.length < limit; r++) {
+        var cell = rows[r].querySelector('td');
+        if (!cell) continue;
+        var text = cell.textContent.trim().split(/\\s+/)[0];
+        if (text) symbols.push(text);
+    }
+    return symbols;
+}
+return null;
+"""
+
+_SYMBOL_TH = re.compile(r"<th\b[^>]*>(?:\s|<[^>]+>)*[^<]*symbol", re.I)
+_TABLE_OPEN = re.compile(r"<table\b", re.I)
+_TABLE_CLOSE = re.compile(r"</table\s*>", re.I)
+_ROW = re.compile(r"<tr\b[^>]*>(.*?)</tr\s*>", re.I | re.S)
+_FIRST_CELL = re.compile(r"<td\b[^>]*>(.*?)</td\s*>", re.I | re.S)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def parse_symbols_fast(page, limit=30):
+    """First-column symbols of the table with a SYMBOL header, or None if there is no such table."""
+    header = _SYMBOL_TH.search(page)
+    if not header:
+        return None
+    start = 0
+    for table in _TABLE_OPEN.finditer(page, 0, header.start()):
+        start = table.start()
+    end_match = _TABLE_CLOSE.search(page, header.end())
+    fragment = page[start:end_match.end() if end_match else len(page)]
+
+    symbols = []
+    for row in _ROW.finditer(fragment):
+        cell = _FIRST_CELL.search(row.group(1))
+        if not cell:
+            continue  # header row
+        words = html.unescape(_TAG.sub(" ", cell.group(1))).split()
+        if words:
+            symbols.append(words[0])
+            if len(symbols) >= limit:
+                break
+    return symbols
+
+
+def parse_symbols_bs4(page, limit=30):
+    """
+    Previous implementation: full-document parse, then scan every table. It used to
+    return "NIFTYBEESEQ" for cells with a series label; fixed here so it stays a fair baseline.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    table = None
+    for tbl in soup.find_all("table"):
+        if tbl.find("th", string=lambda x: x and "SYMBOL" in x.upper()):
+            table = tbl
+            break
+    if not table:
+        return None
+
+    symbols = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if cols:
+            # get_text(strip=True) alone glues the link to the series label
+            # ("NIFTYBEES" + "EQ" -> "NIFTYBEESEQ"), so the text nodes are joined with a space
+            symbols.append(cols[0].get_text(" ", strip=True).split()[0].strip())
+            if len(symbols) >= limit:
+                break
+    return symbols
+
+
+def _time(fn, page, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn(page)
+    return (time.perf_counter() - started) * 1000 / iterations, result
+
+
+def _time_browser(paths, iterations):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=options)
+    try:
+        for path in paths:
+            driver.get("file://" + os.path.abspath(path))
+            page_ms, _ = _time(lambda d: parse_symbols_bs4(d.page_source), driver, iterations)
+            js_ms, got = _time(lambda d: d.execute_script(EXTRACT_SYMBOLS_JS, 30), driver, iterations)
+            print(f"    [chrome] page_source + bs4 : {page_ms:8.2f} ms")
+            print(f"    [chrome] in-browser JS     : {js_ms:8.2f} ms  ({len(got or [])} symbols)")
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fast table parser against the BeautifulSoup baseline.")
+    parser.add_argument("snapshots", nargs="*", default=SNAPSHOTS)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--chrome", action="store_true", help="also time the in-browser extraction in headless Chrome")
+    args = parser.parse_args()
+
+    ok = True
+    for path in args.snapshots:
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        bs4_ms, expected = _time(parse_symbols_bs4, page, args.iterations)
+        fast_ms, got = _time(parse_symbols_fast, page, args.iterations)
+        match = got == expected
+        ok = ok and match
+        print(f"{path} ({len(page) / 1024:.0f} KiB, {len(expected or [])} symbols)")
+        print(f"    bs4 full parse : {bs4_ms:8.2f} ms")
+        print(f"    fast fragment  : {fast_ms:8.2f} ms  ({bs4_ms / fast_ms:.0f}x faster, output {'matches' if match else 'DIFFERS'})")
+        if args.chrome:
+            _time_browser([path], max(1, args.iterations // 10))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""DhanGrid behaviour against the in-process fake driver (no browser needed): python -m pytest test_grid.py"""
+import time
+from fake_webdriver import FakeDriver
+from main import DhanGrid
+from layout import Layout, parse_windows
+
+SETUP = "Page.addScriptToEvaluateOnNewDocument"
+
+
+def make_grid(mode="launch"):
+    grid = DhanGrid(chart_url="http://chart.test", profile_dir=None, mode=mode, state_file=None)
+    grid.driver = FakeDriver(call_latency=0, frame_latency=0)
+    return grid
+
+
+def installs(driver):
+    return [handle for handle, cmd in driver.cdp_calls if cmd == SETUP]
+
+
+def test_attach_installs_frame_setup_on_adopted_grid_tab():
+    grid = make_grid(mode="attach")
+    driver = grid.driver
+    # Chromedriver starts on the user's own Dhan tab; the grid lives in another one
+    driver.window_handles = ["user-tab", "grid-tab"]
+    driver.current_window_handle = "user-tab"
+    driver.grids["grid-tab"] = {"window": 0, "layout": grid.layout.signature(), "symbols": {"chart-frame-0-0": "SBIN"}}
+
+    grid.open_session()
+
+    assert grid.grid_handles == ["grid-tab"]
+    assert installs(driver) == ["grid-tab"]
+    assert grid.slots.shown == {"chart-frame-0-0": "SBIN"}
+
+
+def test_launch_installs_frame_setup_on_the_tab_that_becomes_the_grid():
+    grid = make_grid()
+    grid.open_session()
+
+    assert grid.grid_handles == ["fake-window-0"]
+    assert installs(grid.driver) == ["fake-window-0"]
+
+
+def test_crashed_renderer_marks_the_browser_dead_for_restart():
+    grid = make_grid()
+    grid.open_session()
+    grid.is_initialized = True
+    grid.driver.crashed = True
+
+    verdicts = grid.health.check()
+
+    assert set(verdicts.values()) == {"crashed"}
+    assert len(verdicts) == grid.layout.size
+    assert not grid.watchdog.alive()
+    assert "crashed" in grid.watchdog.reason
+
+
+def test_rendered_frames_escape_the_symbol():
+    layout = Layout(1, 2, 1, parse_windows(""))
+    fid = layout.frame_ids[0]
+    frame = layout._frame(fid, "http://charts", {fid: 'M&M"'}, live=True)
+    assert 'src="http://charts/?symbol=NSE:M%26M%22"' in frame
+    assert 'data-symbol="M&amp;M&quot;"' in frame
+
+
+def test_health_probe_confirms_a_hidden_reload_instead_of_repairing_it():
+    grid = make_grid()
+    grid.open_session()
+    grid.is_initialized = True
+    fid = "chart-frame-1-0"
+    grid.slots.confirm(fid, "OLD")
+    grid.pending_reloads[fid] = "NEW"
+    now = time.time() * 1000
+    grid.driver.probes[fid] = {"state": "ok", "canvas": True, "active": "NSE:NEW", "loadedAt": now - 60000}
+
+    verdicts = grid.health.check()
+
+    assert verdicts == {fid: "ok"}
+    assert grid.slots.shown[fid] == "NEW" and fid not in grid.pending_reloads
+    assert not grid.health.frames[fid].repairs
@@ -0,0 +1,43 @@
+"""Background refresh of the instrument master: python -m pytest test_instruments.py"""
+import threading
+
+import instruments
+from instruments import Instrument, InstrumentMaster
+
+SBIN = Instrument("SBIN", "NSE", "3045", "EQUITY", "EQ")
+
+
+def stale_master(tmp_path, download):
+    master = InstrumentMaster(cache_path=str(tmp_path / "master.pkl"), aliases_path=str(tmp_path / "aliases.txt"))
+    master.index, master.day = {"SBIN": SBIN}, "2000-01-01"
+    master.download = download
+    return master
+
+
+def test_refresh_runs_in_background_and_keeps_the_cached_index(tmp_path):
+    release = threading.Event()
+    master = stale_master(tmp_path, lambda: release.wait(5))
+
+    master.refresh_if_stale()
+    assert master.refresh_thread.is_alive()  # returned while the download is still running
+    assert master.resolve_all(["SBIN-EQ"]) == ["SBIN"]
+    release.set()
+    master.refresh_thread.join(5)
+
+
+def test_failed_download_is_not_retried_within_the_backoff(tmp_path, monkeypatch):
+    attempts = []
+
+    def download():
+        attempts.append(1)
+        raise Exception("offline")
+
+    master = stale_master(tmp_path, download)
+    master.refresh_if_stale(background=False)
+    master.refresh_if_stale(background=False)
+    assert len(attempts) == 1
+    assert master.index == {"SBIN": SBIN}
+
+    monkeypatch.setattr(instruments, "REFRESH_BACKOFF", 0)
+    master.refresh_if_stale(background=False)
+    assert len(attempts) == 2
@@ -0,0 +1,68 @@
+"""NSEHttpClient against the local NSE stub: python -m pytest test_nse_client.py"""
+import pytest
+
+from main import NSE_API_PATH, NSE_PAGE_PATH
+from nse_client import NSEHttpClient, NSESessionRejected
+from stub_server import SESSION_COOKIE, StubHandler, start_stub_server
+
+
+class RejectingHandler(StubHandler):
+    reject_api = True  # what `stub_server.py --reject-api` serves
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(handler=StubHandler):
+        server, base_url = start_stub_server(0, handler)
+        servers.append(server)
+        return NSEHttpClient(base_url, NSE_PAGE_PATH)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_warm_up_picks_up_the_session_cookies(stub):
+    client = stub()
+    client.warm_up()
+    assert client.generation == 1
+    assert SESSION_COOKIE in client.session.cookies
+    assert client.get_json(NSE_API_PATH)["data"]
+    client.close()
+
+
+def test_rejected_call_refreshes_the_session_once(stub):
+    client = stub()
+    client.warm_up()
+    stale = client.session
+    stale.cookies.clear()  # cookies expired server-side: the next call gets a 401
+
+    assert client.get_json(NSE_API_PATH)["data"]
+    assert client.generation == 2 and client.session is not stale
+    # A thread that saw the 401 on the old generation does not warm up again
+    client._refresh(1)
+    assert client.generation == 2
+    client.close()
+
+
+def test_blocked_session_raises_after_one_refresh(stub):
+    client = stub(RejectingHandler)
+    client.warm_up()
+    with pytest.raises(NSESessionRejected):
+        client.get_json(NSE_API_PATH)
+    assert client.generation == 2
+    client.close()
+
+
+def test_failed_warm_up_keeps_the_working_session(stub):
+    client = stub()
+    client.warm_up()
+    working = client.session
+    client.referer = client.base_url + "/no-such-page"  # stub answers 404
+    with pytest.raises(Exception):
+        client.warm_up()
+    assert client.session is working and client.generation == 1
+    client.close()
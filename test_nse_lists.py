@@ -0,0 +1,36 @@
+"""Merging of the NSE live-analysis lists: python -m pytest test_nse_lists.py"""
+import pytest
+
+from nse_lists import DEFAULT_WEIGHTS, list_rows, merge_rankings, parse_weights
+
+
+def test_parse_weights():
+    assert parse_weights("") == DEFAULT_WEIGHTS
+    assert parse_weights("volume_spurts=1, gainers=0.5,losers") == {"volume_spurts": 1.0, "gainers": 0.5, "losers": 1.0}
+    assert parse_weights("oi_spurts=0") == {"oi_spurts": 0.0}
+    with pytest.raises(ValueError):
+        parse_weights("volume=1")
+
+
+def test_merge_adds_scores_across_lists():
+    rankings = {"volume_spurts": ["A", "B", "C", "D"], "gainers": ["D", "A"]}
+    weights = {"volume_spurts": 1.0, "gainers": 0.5}
+    # A: 1 + 0.25, D: 0.25 + 0.5, B: 0.75, C: 0.5
+    assert merge_rankings(rankings, weights) == ["A", "B", "D", "C"]
+
+
+def test_merge_ignores_unweighted_lists_and_keeps_tie_order():
+    rankings = {"volume_spurts": ["A", "B"], "losers": ["Z", "B"], "gainers": ["C", "D"]}
+    assert merge_rankings(rankings, {"volume_spurts": 1.0, "gainers": 1.0}) == ["A", "C", "B", "D", "Z"]
+
+
+def test_bonus_only_lifts_symbols_listed_now():
+    rankings = {"volume_spurts": ["A", "B", "C"]}
+    merged = merge_rankings(rankings, {"volume_spurts": 1.0}, bonus={"C": 0.9, "GONE": 5.0})
+    assert merged == ["C", "A", "B"]
+
+
+def test_list_rows_follows_the_response_path():
+    data = {"allSec": {"data": [{"symbol": "A"}, {"symbol": ""}, "junk", {"symbol": "B"}]}}
+    assert [row["symbol"] for row in list_rows(data, ("allSec", "data"))] == ["A", "B"]
+    assert list_rows(None, ("data",)) == []
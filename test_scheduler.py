@@ -0,0 +1,48 @@
+"""Market calendar and tick alignment: python -m pytest test_scheduler.py"""
+import asyncio
+from datetime import date, datetime
+
+from scheduler import IST, LatestMailbox, MarketCalendar, next_tick
+
+FRIDAY = date(2026, 10, 16)
+HOLIDAY = date(2026, 10, 19)  # the Monday after
+
+
+def ist(day, hour, minute, second=0):
+    return datetime(day.year, day.month, day.day, hour, minute, second, tzinfo=IST)
+
+
+def test_next_tick_is_aligned_to_ist_wall_clock():
+    now = ist(FRIDAY, 9, 17, 30).timestamp()
+    assert next_tick(300, now) == ist(FRIDAY, 9, 20).timestamp()
+    # Exactly on a tick: the following one
+    assert next_tick(300, ist(FRIDAY, 9, 20).timestamp()) == ist(FRIDAY, 9, 25).timestamp()
+    # Day-long interval ticks at IST midnight, not UTC midnight
+    assert next_tick(86400, now) == ist(date(2026, 10, 17), 0, 0).timestamp()
+
+
+def test_session_hours():
+    calendar = MarketCalendar(holidays=[HOLIDAY])
+    assert not calendar.is_open(ist(FRIDAY, 9, 14, 59))
+    assert calendar.is_open(ist(FRIDAY, 9, 15))
+    assert not calendar.is_open(ist(FRIDAY, 15, 30))
+    assert not calendar.is_open(ist(date(2026, 10, 17), 11, 0))  # Saturday
+    assert not calendar.is_open(ist(HOLIDAY, 11, 0))
+
+
+def test_next_open_skips_weekends_and_holidays():
+    calendar = MarketCalendar(holidays=[HOLIDAY])
+    assert calendar.next_open(ist(FRIDAY, 8, 0)) == ist(FRIDAY, 9, 15)
+    assert calendar.next_open(ist(FRIDAY, 16, 0)) == ist(date(2026, 10, 20), 9, 15)
+    # Other time zones are converted to IST first (03:00 UTC Friday is 08:30 IST)
+    utc = datetime.fromisoformat("2026-10-16T03:00:00+00:00")
+    assert calendar.next_open(utc) == ist(FRIDAY, 9, 15)
+
+
+def test_mailbox_keeps_only_the_newest_ranking():
+    mailbox = LatestMailbox()
+    mailbox.put(("09:15", ["A"]))
+    mailbox.put(("09:20", ["B"]))
+    assert mailbox.dropped == 1
+    assert asyncio.run(mailbox.get()) == ("09:20", ["B"])
+    assert not mailbox.has_pending()
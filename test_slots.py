@@ -0,0 +1,60 @@
+"""Diff-based slot assignment: python -m pytest test_slots.py"""
+from slots import SlotAssigner
+
+FRAMES = ["f0", "f1", "f2", "f3"]
+
+
+def applied(slots, symbols):
+    """Plans `symbols` and confirms every update, like a refresh where all frames load."""
+    plan = slots.plan(symbols)
+    for fid, sym in plan.updates:
+        slots.confirm(fid, sym)
+    return plan
+
+
+def test_first_plan_fills_frames_in_order():
+    plan = SlotAssigner(FRAMES).plan(["A", "B", "A", "C", "D", "E"])
+    assert plan.updates == [("f0", "A"), ("f1", "B"), ("f2", "C"), ("f3", "D")]
+    assert plan.skipped == 0 and plan.vacated == []
+
+
+def test_symbols_that_stay_keep_their_frame_whatever_their_rank():
+    slots = SlotAssigner(FRAMES)
+    applied(slots, ["A", "B", "C", "D"])
+    plan = applied(slots, ["D", "C", "E", "A"])
+    assert plan.updates == [("f1", "E")]  # only B's frame changes
+    assert plan.skipped == 3
+    assert slots.shown == {"f0": "A", "f1": "E", "f2": "C", "f3": "D"}
+
+
+def test_dropped_symbols_leave_vacated_frames_untouched():
+    slots = SlotAssigner(FRAMES)
+    applied(slots, ["A", "B", "C"])
+    plan = applied(slots, ["A"])
+    assert plan.updates == [] and plan.skipped == 1
+    assert plan.vacated == ["f1", "f2"]
+    assert slots.shown["f1"] == "B"
+
+
+def test_returning_symbol_reuses_the_frame_still_showing_it():
+    slots = SlotAssigner(FRAMES)
+    applied(slots, ["A", "B", "C"])
+    applied(slots, ["A", "C"])
+    plan = slots.plan(["A", "X", "C", "B"])
+    assert ("f1", "B") not in plan.updates and slots.assigned["B"] == "f1"
+    assert plan.updates == [("f3", "X")]
+
+
+def test_unconfirmed_updates_are_planned_again():
+    slots = SlotAssigner(FRAMES)
+    slots.plan(["A", "B"])
+    slots.confirm("f0", "A")
+    assert slots.plan(["A", "B"]).updates == [("f1", "B")]
+
+
+def test_restore_seeds_what_is_on_screen():
+    slots = SlotAssigner(FRAMES)
+    slots.restore({"f2": "A", "gone": "B"})
+    plan = slots.plan(["A", "B"])
+    assert slots.assigned["A"] == "f2"
+    assert plan.updates == [("f0", "B")] and plan.skipped == 1
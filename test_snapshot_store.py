@@ -0,0 +1,58 @@
+"""Snapshot store queries and crash recovery: python -m pytest test_snapshot_store.py"""
+import os
+
+from snapshot_store import ROW_DTYPE, SnapshotStore
+
+
+def table(*symbols):
+    return [{"symbol": sym} for sym in symbols]
+
+
+def filled(path):
+    store = SnapshotStore(str(path))
+    store.append({"volume_spurts": table("A", "B", "C")}, ts=100)
+    store.append({"volume_spurts": table("A", "C", "D")}, ts=200)
+    store.append({"volume_spurts": table("A", "D", "B"), "grid": table("A", "C")}, ts=300)
+    return store
+
+
+def test_persistence_streaks_churn_and_first_seen(tmp_path):
+    store = filled(tmp_path)
+    assert store.cycles() == 3
+    assert store.persistence(top=2) == {"A": 1.0, "B": 1 / 3, "C": 1 / 3, "D": 1 / 3}
+    assert store.persistence(top=2, window=2) == {"A": 1.0, "C": 0.5, "D": 0.5}
+    assert store.streaks(top=2) == {"A": 3, "D": 1}
+    cycles, entered = store.churn(top=2)
+    assert list(cycles) == [1, 2] and list(entered) == [1, 1]
+    assert store.first_seen() == {"A": 100, "B": 100, "C": 100, "D": 200}
+
+
+def test_grid_list_is_kept_apart_from_the_nse_lists(tmp_path):
+    store = filled(tmp_path)
+    assert store.persistence(top=24, list_name="grid") == {"A": 1.0, "C": 1.0}
+    assert store.persistence(top=1) == {"A": 1.0}  # grid rank 0 of "A" is not counted twice
+
+
+def test_reopened_store_continues_the_cycles(tmp_path):
+    filled(tmp_path)
+    store = SnapshotStore(str(tmp_path))
+    assert store.next_cycle == 3
+    assert store.append({"gainers": table("E")}) == 3
+    assert store.first_seen(list_name="gainers").keys() == {"E"}
+
+
+def test_torn_writes_are_cut_before_appending(tmp_path):
+    store = filled(tmp_path)
+    with open(store.rows_file, "ab") as f:
+        f.write(b"\x01\x02")
+    with open(store.symbols_file, "a") as f:
+        f.write("HALFWRI")
+
+    store = SnapshotStore(str(tmp_path))
+    assert os.path.getsize(store.rows_file) % ROW_DTYPE.itemsize == 0
+    assert store.symbols == ["A", "B", "C", "D"]
+    assert store.append({"volume_spurts": table("E", "A")}) == 3
+    rows = store.rows()
+    assert list(rows["cycle"][-2:]) == [3, 3]
+    assert [store.symbols[i] for i in rows["symbol"][-2:]] == ["E", "A"]
+    assert list(rows["rank"][-2:]) == [0, 1]
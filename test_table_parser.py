@@ -0,0 +1,29 @@
+"""Both NSE table parsers against the recorded volume-gainers page: python -m pytest test_table_parser.py"""
+from table_parser import SNAPSHOTS, parse_symbols_bs4, parse_symbols_fast
+
+# First column of recordings/volume_gainers.html, without the "EQ" series labels
+EXPECTED = [
+    "NIFTYBEES", "HDFCBANK", "SILVERBEES", "ICICIBANK", "HINDCOPPER", "RELIANCE",
+    "IEX", "TATAELXSI", "TITAN", "GROWW", "CUPID", "NATIONALUM",
+    "ETERNAL", "SENCO", "ITC", "DIXON", "KAYNES", "BHARTIARTL",
+    "KALYANKJIL", "SBIN", "BSE", "IDEA", "YESBANK", "SUZLON",
+    "IRFC", "NHPC", "PNB", "BEL", "TATASTEEL", "GOLDBEES",
+]
+
+
+def recording():
+    with open(SNAPSHOTS[0], encoding="utf-8") as f:
+        return f.read()
+
+
+def test_fast_parser_reads_recorded_symbols():
+    assert parse_symbols_fast(recording()) == EXPECTED
+
+
+def test_bs4_baseline_reads_recorded_symbols():
+    assert parse_symbols_bs4(recording()) == EXPECTED
+
+
+def test_limit():
+    assert parse_symbols_fast(recording(), limit=5) == EXPECTED[:5]
+    assert parse_symbols_bs4(recording(), limit=5) == EXPECTED[:5]